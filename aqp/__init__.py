@@ -1,17 +1,43 @@
 __all__ = [
     "execute_config",
+    "plan_config",
+    "write_config",
+    "iter_rows",
     "load",
     "loads",
+    "load_many",
+    "load_output",
+    "profile",
     "Lexer",
     "Parser",
     "Reader",
     "Config",
     "FileMode",
     "Action",
+    "OutputFormat",
+    "ExecutionStats",
+    "ExecutionPlan",
+    "Strategy",
+    "ConfigRegistry",
+    "ProfileMode",
+    "Profiler",
 ]
 
 from .lib.config import Action, Config, FileMode
-from .lib.functions import execute_config, load, loads
+from .lib.functions import (
+    execute_config,
+    iter_rows,
+    load,
+    load_many,
+    loads,
+    plan_config,
+    write_config,
+)
 from .lib.lexer import Lexer
+from .lib.output import OutputFormat, load_output
 from .lib.parser import Parser
+from .lib.plan import ExecutionPlan, Strategy
+from .lib.profiling import ProfileMode, Profiler, profile
 from .lib.reader import Reader
+from .lib.registry import ConfigRegistry
+from .lib.stats import ExecutionStats
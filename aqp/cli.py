@@ -1,35 +1,182 @@
 import argparse
-import json
+import os
 import pathlib
+import sys
 
-from aqp.lib.functions import execute_config, load
+from aqp.lib.cache import CACHE_SIZE
+from aqp.lib.config import Config
+from aqp.lib.functions import (
+    find_config_files,
+    load_many,
+    plan_config,
+    write_config,
+)
+from aqp.lib.output import OutputFormat
+from aqp.lib.plan import Strategy
+from aqp.lib.profiling import ProfileMode, profile
+from aqp.lib.stats import ExecutionStats
+from aqp.lib.watch import watch
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(prog="aqp", description="Parses AQC config files")
 
-    parser.add_argument("config_path", help="path to the AQC config file")
+    parser.add_argument(
+        "config_path",
+        help="path to the AQC config file, a directory of .aqc files or a glob",
+    )
     parser.add_argument("id", type=int, help="configuration id to parse")
     parser.add_argument("-o", "--output", help="output file path")
+    parser.add_argument(
+        "-f",
+        "--format",
+        type=OutputFormat,
+        choices=list(OutputFormat),
+        default=OutputFormat.JSON,
+        help="output format (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--memo-size",
+        type=int,
+        default=0,
+        help="memoize handler results for this many distinct lines (default: off)",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=CACHE_SIZE >> 20,
+        help="with --watch, MiB of handled columns kept between runs "
+        "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--stats", action="store_true", help="print execution statistics to stderr"
+    )
+    parser.add_argument(
+        "--workers", type=int, help="maximum number of worker processes (default: CPUs)"
+    )
+    parser.add_argument(
+        "--strategy",
+        type=Strategy,
+        choices=list(Strategy),
+        help="execution strategy (default: chosen from the estimated cost)",
+    )
+    parser.add_argument(
+        "--explain",
+        action="store_true",
+        help="print the execution plan without running it",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="keep running, re-executing when the config or data files change",
+    )
+    parser.add_argument(
+        "--profile",
+        type=ProfileMode,
+        choices=list(ProfileMode),
+        help="profile loading and execution, printing a summary to stderr",
+    )
+    parser.add_argument(
+        "--profile-out",
+        default="aqp_profile",
+        help="directory to write the profiles to (default: %(default)s)",
+    )
 
     args = parser.parse_args()
 
-    with open(args.config_path, "r") as file:
-        config_dict = load(file)
+    if args.profile is None:
+        _run(parser, args)
+        return
 
-    config = config_dict[args.id]
-    config.path_to_config = args.config_path
+    with profile(args.profile) as profiler:
+        _run(parser, args)
 
-    json_dict = execute_config(config)
+    paths = profiler.write(args.profile_out)
+    print(profiler.summary(), file=sys.stderr)
+    print(f"profiles written to {', '.join(paths)}", file=sys.stderr)
+
+
+def _run(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    config_paths = find_config_files(args.config_path)
+    if not config_paths:
+        parser.error(f"no config files found at {args.config_path}")
+
+    if args.watch:
+        _watch(parser, args, config_paths)
+        return
+
+    registry = load_many(config_paths, workers=args.workers)
+
+    for config_id, paths in registry.duplicates.items():
+        print(
+            f"warning: configuration {config_id} is defined in "
+            f"{', '.join(str(path) for path in paths)}; using the first one",
+            file=sys.stderr,
+        )
+
+    if args.id not in registry:
+        parser.error(f"configuration {args.id} not found")
+
+    config = registry[args.id]
+    assert config.path_to_config is not None
+
+    plan = plan_config(config, workers=args.workers, strategy=args.strategy)
+
+    if args.explain:
+        print(plan.explain())
+        return
 
     if args.output is None:
-        config_path = pathlib.Path(args.config_path)
-        args.output = config_path.with_stem(config_path.stem + "_out").with_suffix(
-            ".json"
+        args.output = _default_output(config.path_to_config, args.format)
+
+    stats = ExecutionStats()
+    write_config(plan, args.output, args.format, memo_size=args.memo_size, stats=stats)
+
+    if args.stats:
+        print(stats, file=sys.stderr)
+
+
+def _watch(
+    parser: argparse.ArgumentParser, args: argparse.Namespace, config_paths: list[str]
+) -> None:
+    # loading and every run, including the first, happen in watch, which reports errors
+    # and keeps waiting instead of exiting
+    if args.strategy is not None or args.workers is not None or args.explain:
+        parser.error(
+            "--watch always runs serially and can't be combined with "
+            "--strategy, --workers or --explain"
+        )
+
+    if args.output is None:
+        if len(config_paths) > 1:
+            parser.error("--watch needs --output when several config files are found")
+        args.output = _default_output(config_paths[0], args.format)
+
+    def on_run(config: Config, stats: ExecutionStats) -> None:
+        if args.stats:
+            print(stats, file=sys.stderr)
+
+    try:
+        watch(
+            args.config_path,
+            args.id,
+            args.output,
+            args.format,
+            memo_size=args.memo_size,
+            cache_size=args.cache_size << 20,
+            on_run=on_run,
         )
+    except KeyboardInterrupt:
+        pass
+
 
-    with open(args.output, "w") as file:
-        json.dump(json_dict, file, indent=4)
+def _default_output(
+    path_to_config: str | os.PathLike, output_format: OutputFormat
+) -> pathlib.Path:
+    config_path = pathlib.Path(path_to_config)
+    return config_path.with_stem(config_path.stem + "_out").with_suffix(
+        output_format.suffix
+    )
 
 
 if __name__ == "__main__":
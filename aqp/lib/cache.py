@@ -0,0 +1,96 @@
+import sys
+from typing import Iterable, Iterator, Optional
+
+from .config import Action
+from .plan import PlannedFile
+
+_CacheKey = tuple[Action, tuple[int, int], int, int, int]
+
+# the default bound of the memory taken by cached columns
+CACHE_SIZE = 256 << 20
+
+# a list slot for every cached value, on top of the string itself
+_POINTER_SIZE = 8
+
+
+class ColumnCache:
+    """
+    Handled columns of data files from a previous run, reused while the file's inode, size
+    and modification time are unchanged. Columns that weren't used by the latest complete
+    run are dropped.
+
+    The columns kept take about ``max_size`` bytes at most, counted with ``sys.getsizeof``.
+    Columns that don't fit in what is left of it are handled again on the next run, and
+    while a run replaces them the columns of the previous run are kept as well.
+    """
+
+    def __init__(self, max_size: int = CACHE_SIZE) -> None:
+        self.max_size = max_size
+        self._columns: dict[_CacheKey, tuple[list[str], int]] = {}
+        self._next: dict[_CacheKey, tuple[list[str], int]] = {}
+        self._next_size = 0
+
+    def __len__(self) -> int:
+        return len(self._columns)
+
+    @property
+    def size(self) -> int:
+        """Approximate size of the cached columns in bytes"""
+
+        return sum(size for _, size in self._columns.values())
+
+    def begin(self) -> None:
+        """Starts a run"""
+
+        self._next = {}
+        self._next_size = 0
+
+    def get(
+        self, action: Action, file: PlannedFile, file_ind: int
+    ) -> Optional[list[str]]:
+        """Returns the cached column, ``file_ind`` should be 0 if the action doesn't
+        depend on the file number"""
+
+        key = self._key(action, file, file_ind)
+        entry = self._columns.get(key)
+        if entry is None:
+            return None
+
+        column, size = entry
+        if self._next_size + size <= self.max_size:
+            self._next[key] = entry
+            self._next_size += size
+        return column
+
+    def collect(
+        self, action: Action, file: PlannedFile, file_ind: int, column: Iterable[str]
+    ) -> Iterator[str]:
+        """Yields the values of ``column``, keeping them for the next run once it's
+        exhausted, unless they outgrow the space left"""
+
+        values: Optional[list[str]] = []
+        size = 0
+
+        for value in column:
+            if values is not None:
+                size += sys.getsizeof(value) + _POINTER_SIZE
+                if self._next_size + size <= self.max_size:
+                    values.append(value)
+                else:
+                    values = None
+            yield value
+
+        if values is not None:
+            self._next[self._key(action, file, file_ind)] = values, size
+            self._next_size += size
+
+    def commit(self) -> None:
+        """Finishes a run, dropping the columns it didn't use"""
+
+        self._columns = self._next
+        self._next = {}
+        self._next_size = 0
+
+    @staticmethod
+    def _key(action: Action, file: PlannedFile, file_ind: int) -> _CacheKey:
+        return action, file.key, file.size, file.mtime_ns, file_ind
@@ -0,0 +1,88 @@
+import bz2
+import gzip
+import importlib
+import io
+import lzma
+import os
+import re
+from enum import StrEnum, auto
+from typing import BinaryIO, TextIO, cast
+
+from .error import AqpError
+
+"""Transparent streaming decompression of data files"""
+
+READ_BUFFER_SIZE = 1 << 20
+
+
+class Compression(StrEnum):
+    NONE = auto()
+    GZIP = auto()
+    BZIP2 = auto()
+    XZ = auto()
+    ZSTD = auto()
+
+    def __bool__(self) -> bool:
+        return self != Compression.NONE
+
+
+# "BZh" alone is a plausible start of a text line, so bzip2 also needs the block size
+# digit and the magic of its first block, or of the end of the stream if it's empty
+_MAGIC_BYTES = (
+    (re.compile(rb"\x1f\x8b"), Compression.GZIP),
+    (re.compile(rb"BZh[1-9](1AY&SY|\x17rE8P\x90)"), Compression.BZIP2),
+    (re.compile(rb"\xfd7zXZ\x00"), Compression.XZ),
+    (re.compile(rb"\x28\xb5\x2f\xfd"), Compression.ZSTD),
+)
+_MAGIC_LENGTH = 10
+
+
+class CompressionError(AqpError): ...
+
+
+def detect_compression(path: str | os.PathLike) -> Compression:
+    """Detects the compression of a file by its magic bytes. The extension is ignored, so
+    an empty or still plain file named like a compressed one is read as plain text"""
+
+    with open(path, "rb") as file:
+        start = file.read(_MAGIC_LENGTH)
+
+    for magic, compression in _MAGIC_BYTES:
+        if magic.match(start):
+            return compression
+
+    return Compression.NONE
+
+
+def open_data_file(
+    path: str | os.PathLike, buffer_size: int = READ_BUFFER_SIZE
+) -> TextIO:
+    """Opens a data file for reading text, decompressing it while streaming if needed"""
+
+    compression = detect_compression(path)
+
+    if not compression:
+        return open(path, buffering=buffer_size)
+
+    binary = cast(io.RawIOBase, _open_decompressed(path, compression))
+    return io.TextIOWrapper(io.BufferedReader(binary, buffer_size=buffer_size))
+
+
+def _open_decompressed(path: str | os.PathLike, compression: Compression) -> BinaryIO:
+    match compression:
+        case Compression.GZIP:
+            return cast(BinaryIO, gzip.open(path, "rb"))
+        case Compression.BZIP2:
+            return cast(BinaryIO, bz2.open(path, "rb"))
+        case Compression.XZ:
+            return cast(BinaryIO, lzma.open(path, "rb"))
+        case Compression.ZSTD:
+            try:
+                zstd = importlib.import_module("compression.zstd")
+            except ImportError:
+                raise CompressionError(
+                    f"{path}: zstd compressed files need Python 3.14 or newer"
+                ) from None
+            return cast(BinaryIO, zstd.open(path, "rb"))
+        case _:
+            raise CompressionError(f"Unsupported compression {compression}")
@@ -24,8 +24,11 @@ class Action(StrEnum):
 
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, frozen=True, slots=True)
 class Config:
+    """A single configuration. Immutable, so configs loaded from the same file can share
+    their ``action_path`` tuples, use ``dataclasses.replace`` to derive a modified copy"""
+
     config_id: int
 
     path_to_config: Optional[str | PathLike] = None
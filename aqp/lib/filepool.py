@@ -0,0 +1,172 @@
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+from types import TracebackType
+from typing import Optional, TextIO
+
+from .compression import detect_compression, open_data_file
+
+"""A bounded pool of open data files"""
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None  # type: ignore[assignment]
+
+_DEFAULT_MAX_OPEN = 1024
+_MIN_OPEN = 4
+# smaller than the usual read buffer, since many files may be open at once
+POOL_BUFFER_SIZE = 64 << 10
+_DECOMPRESSED_ENCODING = "utf-8"
+_DECOMPRESSED_ERRORS = "surrogatepass"
+
+
+def default_max_open() -> int:
+    """A quarter of the soft ``RLIMIT_NOFILE``, leaving room for everything else the process
+    has open, capped at 1024"""
+
+    if resource is None:
+        return _DEFAULT_MAX_OPEN
+
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == resource.RLIM_INFINITY:
+        return _DEFAULT_MAX_OPEN
+    return max(_MIN_OPEN, min(_DEFAULT_MAX_OPEN, soft // 4))
+
+
+class FilePool:
+    """
+    Reads data files in batches of lines while keeping at most ``max_open`` of them open.
+    The least recently used file is closed when the limit is reached, and reopened at its
+    remembered offset when it's read again.
+
+    Seeking in a compressed file means decompressing it from the start again, which would
+    happen on every batch when files are read round robin. So when a compressed file is
+    evicted, the rest of it is decompressed into a temporary file once, and read from
+    there afterwards.
+    """
+
+    def __init__(self, max_open: Optional[int] = None) -> None:
+        self.max_open = max(1, max_open if max_open is not None else default_max_open())
+        self._open: OrderedDict[str | os.PathLike, TextIO] = OrderedDict()
+        self._offsets: dict[str | os.PathLike, int] = {}
+        self._compressed: set[str | os.PathLike] = set()
+        self._decompressed: dict[str | os.PathLike, str] = {}
+        self._temp_dir: Optional[str] = None
+        self.reopen_count = 0
+        self.decompress_count = 0
+
+    @property
+    def open_count(self) -> int:
+        return len(self._open)
+
+    def read_lines(self, path: str | os.PathLike, count: int) -> list[str]:
+        """Returns the next ``count`` lines of ``path`` without line terminators.
+        Returns fewer at the end of the file, and an empty ``list`` after it."""
+
+        file = self._get(path)
+        lines = []
+
+        for _ in range(count):
+            line = file.readline()
+            if not line:
+                break
+            lines.append(line.removesuffix("\n"))
+
+        return lines
+
+    def close(self, path: str | os.PathLike) -> None:
+        """Closes ``path`` and forgets its offset"""
+
+        file = self._open.pop(path, None)
+        if file is not None:
+            file.close()
+        self._offsets.pop(path, None)
+        self._compressed.discard(path)
+
+        decompressed = self._decompressed.pop(path, None)
+        if decompressed is not None:
+            os.remove(decompressed)
+
+    def close_all(self) -> None:
+        for file in self._open.values():
+            file.close()
+        self._open.clear()
+        self._offsets.clear()
+        self._compressed.clear()
+        self._decompressed.clear()
+
+        if self._temp_dir is not None:
+            shutil.rmtree(self._temp_dir, ignore_errors=True)
+            self._temp_dir = None
+
+    def _get(self, path: str | os.PathLike) -> TextIO:
+        file = self._open.get(path)
+        if file is not None:
+            self._open.move_to_end(path)
+            return file
+
+        while len(self._open) >= self.max_open:
+            self._evict()
+
+        decompressed = self._decompressed.get(path)
+        if decompressed is not None:
+            file = open(
+                decompressed,
+                encoding=_DECOMPRESSED_ENCODING,
+                errors=_DECOMPRESSED_ERRORS,
+                newline="\n",
+                buffering=POOL_BUFFER_SIZE,
+            )
+        else:
+            if path not in self._offsets and detect_compression(path):
+                self._compressed.add(path)
+            file = open_data_file(path, buffer_size=POOL_BUFFER_SIZE)
+
+        offset = self._offsets.pop(path, None)
+        if offset is not None:
+            self.reopen_count += 1
+            file.seek(offset)
+
+        self._open[path] = file
+        return file
+
+    def _evict(self) -> None:
+        path, file = self._open.popitem(last=False)
+
+        if path in self._compressed and path not in self._decompressed:
+            self._decompressed[path] = self._decompress_rest(file)
+            self._offsets[path] = 0
+        else:
+            self._offsets[path] = file.tell()
+
+        file.close()
+
+    def _decompress_rest(self, file: TextIO) -> str:
+        if self._temp_dir is None:
+            self._temp_dir = tempfile.mkdtemp(prefix="aqp-pool-")
+
+        self.decompress_count += 1
+        fd, path = tempfile.mkstemp(dir=self._temp_dir)
+        # the text is already decoded with newlines translated, so it's written back as is
+        with open(
+            fd,
+            "w",
+            encoding=_DECOMPRESSED_ENCODING,
+            errors=_DECOMPRESSED_ERRORS,
+            newline="\n",
+        ) as out:
+            shutil.copyfileobj(file, out, POOL_BUFFER_SIZE)
+        return path
+
+    def __enter__(self) -> "FilePool":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close_all()
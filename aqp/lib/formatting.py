@@ -0,0 +1,11 @@
+"""Human readable formatting shared by the plan and profiler summaries"""
+
+
+def format_size(size: float) -> str:
+    """Formats a number of bytes with a binary unit, e.g. ``1.5 MiB``"""
+
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TiB"
@@ -1,14 +1,64 @@
+import functools
+import glob
+import io
+import itertools
 import os
-from typing import Any, Callable, Collection, TextIO
-
+import tempfile
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from contextlib import ExitStack, closing
+from dataclasses import dataclass, field, replace
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Generator,
+    Iterable,
+    Iterator,
+    Optional,
+    TextIO,
+    TypeVar,
+)
+
+from .cache import ColumnCache
+from .compression import (
+    READ_BUFFER_SIZE,
+    Compression,
+    detect_compression,
+    open_data_file,
+)
 from .config import Action, Config, FileMode
 from .error import AqpError
+from .filepool import POOL_BUFFER_SIZE, FilePool, default_max_open
 from .lexer import Lexer
+from .output import OutputFormat, open_writer
 from .parser import Parser
+from .plan import (
+    CHUNK_SIZE,
+    MIN_PARALLEL_COST,
+    ExecutionPlan,
+    PlannedFile,
+    Strategy,
+    choose_strategy,
+    default_workers,
+    estimate_cost,
+)
+from .profiling import (
+    ProfileMode,
+    Profiler,
+    WorkerProfile,
+    active_profiler,
+    profile_call,
+    stage,
+)
 from .reader import IoReader, Reader, StringReader
+from .registry import ConfigRegistry
+from .stats import ExecutionStats
 
 """Collection of public functions for working with AQC configs"""
 
+T = TypeVar("T")
+
 
 def loads(string: str) -> dict[int, Config]:
     """Loads a ``Config`` from ``string``.
@@ -32,6 +82,61 @@ def load(text_io: TextIO) -> dict[int, Config]:
     return _load(IoReader(text_io))
 
 
+def load_many(
+    paths: Iterable[str | os.PathLike], workers: Optional[int] = None
+) -> ConfigRegistry:
+    """Loads configs from several files, setting ``path_to_config`` on each of them.
+    Files are lexed and parsed in a process pool of up to ``workers`` processes, which
+    defaults to the number of CPUs. Files too small in total to be worth starting the pool
+    for are loaded in this process instead.
+
+    Returns:
+        ConfigRegistry: all loaded configs indexed by id, with duplicate ids across files
+    """
+
+    paths = list(paths)
+    workers = min(default_workers(workers), len(paths))
+    registry = ConfigRegistry()
+
+    with stage("load") as profiler, ExitStack() as stack:
+        loaded: Iterable[dict[int, Config]]
+
+        if workers <= 1 or _estimate_load_cost(paths) < MIN_PARALLEL_COST:
+            loaded = map(_load_path, paths)
+        else:
+            chunksize = max(1, len(paths) // (workers * 4))
+            pool = stack.enter_context(ProcessPoolExecutor(workers))
+
+            if profiler is None:
+                loaded = pool.map(_load_path, paths, chunksize=chunksize)
+            else:
+                loader = functools.partial(
+                    _load_path_profiled, profile_mode=profiler.mode
+                )
+                loaded = _merge_worker_profiles(
+                    profiler, pool.map(loader, paths, chunksize=chunksize)
+                )
+
+        for path, configs in zip(paths, loaded):
+            registry.add(path, configs)
+
+    return registry
+
+
+def find_config_files(pattern: str | os.PathLike) -> list[str]:
+    """Resolves a config file, a directory of ``.aqc`` files or a glob into a sorted
+    ``list`` of config file paths"""
+
+    pattern = os.fspath(pattern)
+
+    if os.path.isdir(pattern):
+        pattern = os.path.join(glob.escape(pattern), "*" + CONFIG_SUFFIX)
+    elif not glob.has_magic(pattern):
+        return [pattern]
+
+    return sorted(path for path in glob.glob(pattern) if os.path.isfile(path))
+
+
 def _get_files(config: Config) -> Collection[str | os.PathLike]:
     assert config.action_path is not None
 
@@ -41,7 +146,7 @@ def _get_files(config: Config) -> Collection[str | os.PathLike]:
         case FileMode.DIR:
             files = []
             for dir_path in config.action_path:
-                for file in os.listdir(dir_path):
+                for file in sorted(os.listdir(dir_path)):
                     file_path = os.path.join(dir_path, file)
                     if os.path.isfile(file_path):
                         files.append(file_path)
@@ -50,20 +155,145 @@ def _get_files(config: Config) -> Collection[str | os.PathLike]:
             raise AqpError(f"Unsupported file mode {config.mode}")
 
 
-def execute_config(config: Config) -> dict:
+def plan_config(
+    config: Config,
+    *,
+    workers: Optional[int] = None,
+    strategy: Optional[Strategy] = None,
+) -> ExecutionPlan:
+    """Builds the ``ExecutionPlan`` for ``config`` from the ``stat`` of every data file and
+    its first few bytes, read once per distinct file to detect its compression. No lines
+    are read or handled. The strategy is chosen from the estimated cost unless
+    ``strategy`` is given. ``workers`` defaults to the number of CPUs.
+    """
+
+    if config.action_path is None:
+        raise AqpError("Action path is not provided")
+
+    file_paths = _get_files(config)
+    line_handler = _get_line_handler(config)
+
+    files = []
+    compressions: dict[tuple[int, int], Compression] = {}
+    for file_path in file_paths:
+        stat = os.stat(file_path)
+        key = (stat.st_dev, stat.st_ino)
+        if key not in compressions:
+            compressions[key] = detect_compression(file_path)
+        files.append(
+            PlannedFile(
+                path=file_path,
+                size=stat.st_size,
+                key=key,
+                compression=compressions[key],
+                mtime_ns=stat.st_mtime_ns,
+            )
+        )
+
+    workers = default_workers(workers)
+    estimated_cost = estimate_cost(files, config.action)
+
+    if strategy is None:
+        strategy = choose_strategy(files, estimated_cost, workers)
+
+    return ExecutionPlan(
+        config=config,
+        files=files,
+        line_handler=line_handler,
+        file_dependent=config.action in _FILE_DEPENDENT_ACTIONS,
+        estimated_cost=estimated_cost,
+        strategy=strategy,
+        workers=workers,
+    )
+
+
+def execute_config(
+    config: Config | ExecutionPlan,
+    *,
+    memo_size: int = 0,
+    stats: Optional[ExecutionStats] = None,
+    cache: Optional[ColumnCache] = None,
+) -> dict:
     """Executes ``config``, writing the results to a ``dict``.
+    ``config`` may also be an ``ExecutionPlan`` from ``plan_config``, otherwise one is built,
+    which stats every file and sniffs its compression before any line is read.
+    Files that resolve to the same inode are read once. If ``memo_size`` is positive, handler
+    results are memoized for that many distinct lines. Counters are collected into ``stats``.
+    With a ``cache``, only files changed since the last run with it are read, and execution
+    happens in this process regardless of the planned strategy.
 
     Returns:
         dict: result of executing the config
     """
 
+    plan = config if isinstance(config, ExecutionPlan) else plan_config(config)
+    json_dict = _config_header(plan.config)
+
+    out: dict[int, dict[int, str]] = {}
+
+    with stage("execute"):
+        if _use_rows(plan, cache):
+            rows = _iter_rows(plan, memo_size, stats or ExecutionStats())
+            out = {
+                line_ind: dict(enumerate(row, start=1))
+                for line_ind, row in enumerate(rows, start=1)
+            }
+        else:
+            for line_ind, file_ind, value in _execute(plan, memo_size, stats, cache):
+                if line_ind not in out:
+                    out[line_ind] = {}
+
+                out[line_ind][file_ind] = value
+
+    json_dict["out"] = out
+
+    return json_dict
+
+
+def iter_rows(
+    config: Config | ExecutionPlan,
+    *,
+    memo_size: int = 0,
+    stats: Optional[ExecutionStats] = None,
+) -> Iterator[tuple[str, ...]]:
+    """Executes ``config`` in this process, yielding one row per line with the values of
+    every file in config order. All files are read together, and files shorter than the
+    longest one are padded with their handled empty line. See ``execute_config`` for the
+    rest of the arguments.
+    """
+
+    plan = config if isinstance(config, ExecutionPlan) else plan_config(config)
+    return _iter_rows(plan, memo_size, stats or ExecutionStats())
+
+
+def write_config(
+    config: Config | ExecutionPlan,
+    output_path: str | os.PathLike,
+    output_format: OutputFormat = OutputFormat.JSON,
+    *,
+    memo_size: int = 0,
+    stats: Optional[ExecutionStats] = None,
+    cache: Optional[ColumnCache] = None,
+) -> None:
+    """Executes ``config``, streaming the results to ``output_path`` in ``output_format``.
+    The written file can be read back with ``load_output``. See ``execute_config`` for the
+    rest of the arguments.
+    """
+
+    plan = config if isinstance(config, ExecutionPlan) else plan_config(config)
+    header = _config_header(plan.config)
+    cells = _execute(plan, memo_size, stats, cache)
+
+    with stage("execute"), open_writer(output_format, output_path, header) as writer:
+        for line_ind, file_ind, value in cells:
+            writer.write(line_ind, file_ind, value)
+
+
+def _config_header(config: Config) -> dict[str, Any]:
     if config.action_path is None:
         raise AqpError("Action path is not provided")
 
-    file_paths = _get_files(config)
-    line_handler = _get_line_handler(config)
-
-    json_dict: dict[str, Any] = {
+    return {
         "configurationId": config.config_id,
         "configFile": config.path_to_config,
         "configurationData": {
@@ -72,34 +302,539 @@ def execute_config(config: Config) -> dict:
         },
     }
 
-    out: dict[int, dict[int, str]] = {}
 
-    file_count = len(file_paths)
+def _execute(
+    plan: ExecutionPlan,
+    memo_size: int,
+    stats: Optional[ExecutionStats],
+    cache: Optional[ColumnCache],
+) -> Iterator[tuple[int, int, str]]:
+    if stats is None:
+        stats = ExecutionStats()
 
-    for file_ind, file_path in enumerate(file_paths, start=1):
-        with open(file_path) as file:
-            for line_ind, line in enumerate(file, start=1):
-                if line_ind not in out:
-                    out[line_ind] = {}
+    if plan.strategy == Strategy.SERIAL or cache is not None:
+        return _iter_cells(plan, memo_size, stats, cache)
+    return _iter_parallel_cells(plan, memo_size, stats)
 
-                out[line_ind][file_ind] = line_handler(
-                    line.removesuffix("\n"), file_ind
-                )
 
-    for line_ind in out:
-        for file_ind in range(1, file_count + 1):
-            if file_ind not in out[line_ind]:
-                out[line_ind][file_ind] = line_handler("", file_ind)
+def _iter_cells(
+    plan: ExecutionPlan,
+    memo_size: int,
+    stats: ExecutionStats,
+    cache: Optional[ColumnCache] = None,
+) -> Iterator[tuple[int, int, str]]:
+    """Yields ``(line, file, value)`` for every cell, file by file, in this process.
+    Files shorter than the longest one are padded with the handled empty line afterwards.
 
-    json_dict["out"] = out
+    Paths resolving to the same ``(st_dev, st_ino)`` are read once. Their handled column is
+    kept until the last duplicate is emitted, or just the lines if the handler depends on
+    the file number, since then it has to be rerun for every file.
 
-    return json_dict
+    Columns found in ``cache`` aren't read at all, the rest are stored there as far as
+    they fit.
+    """
+
+    line_handler = plan.line_handler
+    file_dependent = plan.file_dependent
+
+    if memo_size > 0:
+        line_handler = _memoize_line_handler(
+            line_handler, memo_size, file_dependent, stats
+        )
+
+    uses_left = Counter(file.key for file in plan.files)
+    shared: dict[tuple[int, int], list[str]] = {}
+    line_counts = []
+
+    action = plan.config.action
+    stats.files += len(plan.files)
+
+    if cache is not None:
+        cache.begin()
+
+    for file_ind, file in enumerate(plan.files, start=1):
+        uses_left[file.key] -= 1
+        cache_ind = file_ind if file_dependent else 0
+        cached = cache.get(action, file, cache_ind) if cache is not None else None
+
+        if cached is not None:
+            stats.files_cached += 1
+            column: Iterable[str] = cached
+        elif file.key in shared:
+            column = shared[file.key]
+            if file_dependent:
+                column = (line_handler(line, file_ind) for line in column)
+        else:
+            stats.files_read += 1
+            lines: Iterable[str] = _read_lines(file.path)
+            if uses_left[file.key] > 0 and file_dependent:
+                lines = shared[file.key] = list(lines)
+            column = (line_handler(line, file_ind) for line in lines)
+            if uses_left[file.key] > 0 and not file_dependent:
+                column = shared[file.key] = list(column)
+
+        if uses_left[file.key] == 0:
+            shared.pop(file.key, None)
+
+        if cache is not None and cached is None:
+            column = cache.collect(action, file, cache_ind, column)
+
+        line_ind = 0
+        for line_ind, value in enumerate(column, start=1):
+            yield line_ind, file_ind, value
+        line_counts.append(line_ind)
+
+    if cache is not None:
+        cache.commit()
+
+    yield from _pad_cells(line_counts, line_handler)
+
+
+def _use_rows(plan: ExecutionPlan, cache: Optional[ColumnCache]) -> bool:
+    # beyond the open file limit, reading in lockstep would keep reopening files
+    return (
+        plan.strategy == Strategy.SERIAL
+        and cache is None
+        and len(plan.distinct_files()) <= default_max_open()
+    )
+
+
+# read buffers of all files read in lockstep, split between them
+_ROW_BUFFER_BUDGET = 16 << 20
+
+
+def _iter_rows(
+    plan: ExecutionPlan, memo_size: int, stats: ExecutionStats
+) -> Iterator[tuple[str, ...]]:
+    """Yields every row in this process. Each round reads a batch of lines from every
+    distinct file that hasn't ended yet, handles them into one column per file and zips
+    the columns into rows. A file's handled empty line is computed once, the first time
+    the file runs short.
+    """
+
+    line_handler = plan.line_handler
+    file_dependent = plan.file_dependent
+
+    if memo_size > 0:
+        line_handler = _memoize_line_handler(
+            line_handler, memo_size, file_dependent, stats
+        )
+
+    distinct = plan.distinct_files()
+    file_keys = [file.key for file in plan.files]
+    empty_values: dict[int, str] = {}
+
+    stats.files += len(plan.files)
+    stats.files_read += len(distinct)
+
+    with ExitStack() as stack:
+        readers = _open_batch_readers(distinct, stack)
+
+        while readers:
+            batches = {key: read() for key, read in readers.items()}
+            row_count = max(len(lines) for lines in batches.values())
+            if row_count == 0:
+                break
+
+            handled: dict[tuple[int, int], list[str]] = {}
+            columns: list[Iterable[str]] = []
+
+            for file_ind, key in enumerate(file_keys, start=1):
+                lines = batches.get(key, [])
+
+                if file_dependent:
+                    column = [line_handler(line, file_ind) for line in lines]
+                elif key in handled:
+                    column = handled[key]
+                else:
+                    column = handled[key] = [
+                        line_handler(line, file_ind) for line in lines
+                    ]
+
+                if len(column) < row_count:
+                    if file_ind not in empty_values:
+                        empty_values[file_ind] = line_handler("", file_ind)
+                    columns.append(
+                        itertools.chain(
+                            column,
+                            itertools.repeat(
+                                empty_values[file_ind], row_count - len(column)
+                            ),
+                        )
+                    )
+                else:
+                    columns.append(column)
+
+            for key, lines in batches.items():
+                if len(lines) < _BATCH_LINES:
+                    del readers[key]
+
+            yield from zip(*columns)
+
+
+def _open_batch_readers(
+    files: list[PlannedFile], stack: ExitStack
+) -> dict[tuple[int, int], Callable[[], list[str]]]:
+    """Returns a function per file returning its next ``_BATCH_LINES`` lines. Files are
+    opened directly with a share of ``_ROW_BUFFER_BUDGET`` as their buffer, or through a
+    ``FilePool`` if there are more of them than may be open at once."""
+
+    if len(files) > default_max_open():
+        pool = stack.enter_context(FilePool())
+        return {
+            file.key: functools.partial(pool.read_lines, file.path, _BATCH_LINES)
+            for file in files
+        }
+
+    buffer_size = min(
+        READ_BUFFER_SIZE,
+        max(POOL_BUFFER_SIZE, _ROW_BUFFER_BUDGET // max(1, len(files))),
+    )
+    readers: dict[tuple[int, int], Callable[[], list[str]]] = {}
+
+    for file in files:
+        lines = stack.enter_context(closing(_read_lines(file.path, buffer_size)))
+        readers[file.key] = functools.partial(_take, lines, _BATCH_LINES)
+
+    return readers
+
+
+def _take(lines: Iterator[str], count: int) -> list[str]:
+    return list(itertools.islice(lines, count))
+
+
+@dataclass(frozen=True)
+class _Task:
+    """A unit of parallel work: a whole file or the lines starting in ``[start, end)``.
+    With a ``spill_dir``, the handled values are written to a file there instead of being
+    sent back, so large files can be streamed without holding their results in memory."""
+
+    path: str | os.PathLike
+    file_inds: tuple[int, ...]
+    start: int = 0
+    end: Optional[int] = None
+    spill_dir: Optional[str] = None
+
+
+@dataclass
+class _TaskResult:
+    columns: list[list[str]]
+    stats: ExecutionStats
+    profile: Optional[WorkerProfile] = None
+    spilled: list[str] = field(default_factory=list)
+
+
+def _iter_parallel_cells(
+    plan: ExecutionPlan, memo_size: int, stats: ExecutionStats
+) -> Iterator[tuple[int, int, str]]:
+    """Same as ``_iter_cells``, but the lines are handled in a process pool.
+    Cells of every file come out in line order, files may interleave.
+
+    Streaming plans keep at most two tasks per worker in flight, so reading stops when
+    handling falls behind, and at most one file per worker is open. Large files that can't
+    be split into chunks spill their handled values to a temporary file.
+    """
+
+    worker = functools.partial(
+        _run_task, action=plan.config.action, memo_size=memo_size
+    )
+    pool_worker = worker
+
+    profiler = active_profiler()
+    if profiler is not None:
+        pool_worker = functools.partial(
+            _run_profiled_task,
+            action=plan.config.action,
+            memo_size=memo_size,
+            profile_mode=profiler.mode,
+        )
+
+    line_counts = [0] * len(plan.files)
+
+    stats.files += len(plan.files)
+    stats.files_read += len(plan.distinct_files())
+
+    with ExitStack() as stack:
+        results: Iterable[tuple[_Task, _TaskResult]]
+
+        if plan.strategy == Strategy.STREAMING:
+            spill_dir = stack.enter_context(tempfile.TemporaryDirectory(prefix="aqp-"))
+            tasks = _make_tasks(plan, spill_dir)
+            if plan.workers > 1:
+                pool = stack.enter_context(ProcessPoolExecutor(plan.workers))
+                results = _bounded_map(pool, pool_worker, tasks, 2 * plan.workers)
+            else:
+                results = ((task, worker(task)) for task in tasks)
+        else:
+            tasks = _make_tasks(plan)
+            pool = stack.enter_context(ProcessPoolExecutor(plan.workers))
+            results = zip(tasks, pool.map(pool_worker, tasks))
+
+        for task, result in results:
+            stats.memo_hits += result.stats.memo_hits
+            stats.memo_misses += result.stats.memo_misses
+            if profiler is not None:
+                profiler.add_worker(result.profile)
+
+            columns: list[Iterable[str]] = [
+                *result.columns,
+                *(_SpilledColumn(path) for path in result.spilled),
+            ]
+            if len(columns) == 1:
+                columns = columns * len(task.file_inds)
+
+            for file_ind, column in zip(task.file_inds, columns):
+                line_ind = line_counts[file_ind - 1]
+                for line_ind, value in enumerate(column, start=line_ind + 1):
+                    yield line_ind, file_ind, value
+                line_counts[file_ind - 1] = line_ind
+
+            for path in result.spilled:
+                os.remove(path)
+
+    yield from _pad_cells(line_counts, plan.line_handler)
+
+
+def _group_file_inds(plan: ExecutionPlan) -> dict[tuple[int, int], tuple[int, ...]]:
+    file_inds: dict[tuple[int, int], list[int]] = {}
+    for file_ind, file in enumerate(plan.files, start=1):
+        file_inds.setdefault(file.key, []).append(file_ind)
+    return {key: tuple(inds) for key, inds in file_inds.items()}
+
+
+def _make_tasks(plan: ExecutionPlan, spill_dir: Optional[str] = None) -> list[_Task]:
+    """Splits splittable files into chunks for chunk parallel and streaming plans. With a
+    ``spill_dir``, whole files estimated to be larger than a chunk spill their results."""
+
+    file_inds = _group_file_inds(plan)
+    split = plan.strategy in (Strategy.CHUNK_PARALLEL, Strategy.STREAMING)
+    tasks = []
+
+    for file in plan.distinct_files():
+        inds = file_inds[file.key]
+        if split and file.splittable:
+            for start in range(0, file.size, CHUNK_SIZE):
+                tasks.append(_Task(file.path, inds, start, start + CHUNK_SIZE))
+        elif spill_dir is not None and file.estimated_size > CHUNK_SIZE:
+            tasks.append(_Task(file.path, inds, spill_dir=spill_dir))
+        else:
+            tasks.append(_Task(file.path, inds))
+
+    return tasks
+
+
+_BATCH_LINES = 4096
+
+# handled values never contain a newline, since they're made from lines that don't
+_SPILL_ENCODING = "utf-8"
+_SPILL_ERRORS = "surrogatepass"
+
+
+class _SpilledColumn:
+    """Handled values a worker wrote to ``path``, one per line. Can be iterated repeatedly."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def __iter__(self) -> Iterator[str]:
+        with open(
+            self.path, encoding=_SPILL_ENCODING, errors=_SPILL_ERRORS, newline="\n"
+        ) as file:
+            for line in file:
+                yield line[:-1]
+
+
+def _spill_column(values: Iterable[str], spill_dir: str) -> str:
+    fd, path = tempfile.mkstemp(dir=spill_dir, suffix=".column")
+    with open(
+        fd, "w", encoding=_SPILL_ENCODING, errors=_SPILL_ERRORS, newline="\n"
+    ) as file:
+        file.writelines(value + "\n" for value in values)
+    return path
+
+
+def _run_task(task: _Task, action: Action, memo_size: int) -> _TaskResult:
+    stats = ExecutionStats()
+    line_handler = _get_line_handler(action)
+    file_dependent = action in _FILE_DEPENDENT_ACTIONS
+
+    if memo_size > 0:
+        line_handler = _memoize_line_handler(
+            line_handler, memo_size, file_dependent, stats
+        )
+
+    def read() -> Iterator[str]:
+        if task.end is None:
+            return _read_lines(task.path)
+        return _read_chunk_lines(task.path, task.start, task.end)
+
+    if task.spill_dir is not None:
+        # the file is read again for every duplicate, rather than kept in memory
+        file_inds = task.file_inds if file_dependent else (0,)
+        spilled = [
+            _spill_column(
+                (line_handler(line, file_ind) for line in read()), task.spill_dir
+            )
+            for file_ind in file_inds
+        ]
+        return _TaskResult([], stats, spilled=spilled)
+
+    if not file_dependent:
+        return _TaskResult([[line_handler(line, 0) for line in read()]], stats)
+
+    lines = list(read())
+    columns = [
+        [line_handler(line, file_ind) for line in lines] for file_ind in task.file_inds
+    ]
+    return _TaskResult(columns, stats)
+
+
+def _run_profiled_task(
+    task: _Task, action: Action, memo_size: int, profile_mode: ProfileMode
+) -> _TaskResult:
+    result, profile = profile_call(profile_mode, _run_task, task, action, memo_size)
+    result.profile = profile
+    return result
+
+
+def _bounded_map(
+    pool: Executor,
+    fn: Callable[[_Task], _TaskResult],
+    tasks: Iterable[_Task],
+    window: int,
+) -> Iterator[tuple[_Task, _TaskResult]]:
+    """Like ``pool.map``, but keeps at most ``window`` tasks in flight, only pulling more
+    from ``tasks`` as results are consumed. Yields each task along with its result."""
+
+    pending: deque[tuple[_Task, Future[_TaskResult]]] = deque()
+
+    for task in tasks:
+        if len(pending) >= window:
+            done_task, future = pending.popleft()
+            yield done_task, future.result()
+        pending.append((task, pool.submit(fn, task)))
+
+    while pending:
+        done_task, future = pending.popleft()
+        yield done_task, future.result()
+
+
+def _pad_cells(
+    line_counts: list[int], line_handler: Callable[[str, int], str]
+) -> Iterator[tuple[int, int, str]]:
+    line_count = max(line_counts, default=0)
+
+    for file_ind, file_line_count in enumerate(line_counts, start=1):
+        if file_line_count < line_count:
+            empty_value = line_handler("", file_ind)
+            for line_ind in range(file_line_count + 1, line_count + 1):
+                yield line_ind, file_ind, empty_value
+
+
+def _read_lines(
+    file_path: str | os.PathLike, buffer_size: int = READ_BUFFER_SIZE
+) -> Generator[str, None, None]:
+    with open_data_file(file_path, buffer_size) as file:
+        for line in file:
+            yield line.removesuffix("\n")
+
+
+def _read_chunk_lines(
+    file_path: str | os.PathLike, start: int, end: int
+) -> Iterator[str]:
+    """Reads the lines of an uncompressed file that start in ``[start, end)``"""
+
+    with open(file_path, "rb") as file:
+        if start > 0:
+            file.seek(start - 1)
+            file.readline()
+            start = file.tell()
+
+        file.seek(end - 1)
+        file.readline()
+        end = file.tell()
+
+        file.seek(start)
+        data = file.read(max(0, end - start))
+
+    # decoded the same way ``open`` would, including universal newlines
+    with io.TextIOWrapper(io.BytesIO(data)) as text:
+        for line in text:
+            yield line.removesuffix("\n")
+
+
+def _memoize_line_handler(
+    line_handler: Callable[[str, int], str],
+    memo_size: int,
+    file_dependent: bool,
+    stats: ExecutionStats,
+) -> Callable[[str, int], str]:
+    """Wraps ``line_handler`` in a bounded LRU cache keyed by the line, and also by the file
+    number if ``file_dependent`` is set. Hits and misses are added to ``stats``."""
+
+    memo: OrderedDict[str | tuple[str, int], str] = OrderedDict()
+
+    def handle_line(line: str, file_number: int) -> str:
+        key = (line, file_number) if file_dependent else line
+
+        value = memo.get(key)
+        if value is not None:
+            memo.move_to_end(key)
+            stats.memo_hits += 1
+            return value
+
+        stats.memo_misses += 1
+        value = memo[key] = line_handler(line, file_number)
+        if len(memo) > memo_size:
+            memo.popitem(last=False)
+        return value
+
+    return handle_line
 
 
 def _load(reader: Reader) -> dict[int, Config]:
-    lexer = Lexer(reader)
-    parser = Parser(lexer)
-    return parser.parse()
+    with stage("load"):
+        lexer = Lexer(reader)
+        parser = Parser(lexer)
+        return parser.parse()
+
+
+CONFIG_SUFFIX = ".aqc"
+# rough single core lexing and parsing throughput, in bytes of config per second
+_LOAD_THROUGHPUT = 512 << 10
+
+
+def _estimate_load_cost(paths: Iterable[str | os.PathLike]) -> float:
+    """Estimates the single core run time of loading ``paths`` in seconds"""
+
+    return sum(os.stat(path).st_size for path in paths) / _LOAD_THROUGHPUT
+
+
+def _load_path(path: str | os.PathLike) -> dict[int, Config]:
+    try:
+        with open(path) as file:
+            configs = load(file)
+    except AqpError as error:
+        raise type(error)(f"{path}: {error}") from None
+
+    return {
+        config_id: replace(config, path_to_config=path)
+        for config_id, config in configs.items()
+    }
+
+
+def _merge_worker_profiles(
+    profiler: Profiler, results: Iterable[tuple[T, WorkerProfile]]
+) -> Iterator[T]:
+    for result, profile in results:
+        profiler.add_worker(profile)
+        yield result
+
+
+def _load_path_profiled(
+    path: str | os.PathLike, profile_mode: ProfileMode
+) -> tuple[dict[int, Config], WorkerProfile]:
+    return profile_call(profile_mode, _load_path, path)
 
 
 def _string_handle_line(line: str, file_number: int) -> str:
@@ -111,19 +846,27 @@ def _count_handle_line(line: str, file_number: int) -> str:
 
 
 def _replace_handle_line(line: str, file_number: int) -> str:
-    replacements = {
-        "a": f"1{file_number}",
-        "b": f"2{file_number}",
-        "c": f"3{file_number}",
-    }
-    result = ""
-    for ch in line:
-        result += replacements.get(ch, ch)
-    return result
+    return line.translate(_replacement_table(file_number))
+
+
+@functools.lru_cache(maxsize=1024)
+def _replacement_table(file_number: int) -> dict[int, str]:
+    return str.maketrans(
+        {
+            "a": f"1{file_number}",
+            "b": f"2{file_number}",
+            "c": f"3{file_number}",
+        }
+    )
+
+
+_FILE_DEPENDENT_ACTIONS = frozenset((Action.REPLACE,))
+
 
+def _get_line_handler(config: Config | Action) -> Callable[[str, int], str]:
+    action = config.action if isinstance(config, Config) else config
 
-def _get_line_handler(config: Config) -> Callable[[str, int], str]:
-    match config.action:
+    match action:
         case Action.STRING:
             return _string_handle_line
         case Action.REPLACE:
@@ -131,4 +874,4 @@ def _get_line_handler(config: Config) -> Callable[[str, int], str]:
         case Action.COUNT:
             return _count_handle_line
         case _:
-            raise AqpError(f"Unsupported action {config.action}")
+            raise AqpError(f"Unsupported action {action}")
@@ -47,13 +47,12 @@ class Lexer:
 
         if self._is_potential_id_char() or self._reader.check("id:"):
             self._skip_whitespace()
-            string = ""
+            chars = []
             while self._is_potential_id_char():
-                ch = self._reader.peek()
-                string += ch
+                chars.append(self._reader.peek())
                 self._reader.forward()
 
-            id_value = int(string)
+            id_value = int("".join(chars))
             return tokens.Id(int(id_value), self._reader.get_file_pos())
 
         if self._reader.check("mode:"):
@@ -85,7 +84,7 @@ class Lexer:
     def _read_until(
         self, terminators: Collection[str] | str, return_string: bool = True
     ) -> Optional[str]:
-        string = ""
+        chars = []
 
         if isinstance(terminators, str):
             terminators = (terminators,)
@@ -97,15 +96,15 @@ class Lexer:
                 break
 
             if return_string:
-                string += ch
+                chars.append(ch)
             self._reader.forward()
 
         if return_string:
-            return string.strip()
+            return "".join(chars).strip()
         return None
 
     def _read_escaped_string(self) -> str:
-        string = ""
+        chars = []
 
         while not self._reader.eof():
             ch = self._reader.peek()
@@ -119,10 +118,10 @@ class Lexer:
                     ch = next_ch
                     self._reader.forward()
 
-            string += ch
+            chars.append(ch)
             self._reader.forward()
 
-        return string.strip()
+        return "".join(chars).strip()
 
     def _is_potential_id_char(self) -> bool:
         return str.isnumeric(self._reader.peek())
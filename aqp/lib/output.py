@@ -0,0 +1,406 @@
+import json
+import mmap
+import os
+import sqlite3
+import struct
+import sys
+from abc import ABC, abstractmethod
+from array import array
+from enum import StrEnum, auto
+from types import TracebackType
+from typing import Any, BinaryIO, Iterator, Optional
+
+from .error import AqpError
+
+"""Output backends for executed configs, along with a loader that reads any of them back"""
+
+
+class OutputFormat(StrEnum):
+    JSON = auto()
+    SQLITE = auto()
+    COLUMNAR = auto()
+
+    @property
+    def suffix(self) -> str:
+        """Default file suffix for the format"""
+
+        return _SUFFIXES[self]
+
+
+_SUFFIXES = {
+    OutputFormat.JSON: ".json",
+    OutputFormat.SQLITE: ".sqlite",
+    OutputFormat.COLUMNAR: ".aqpc",
+}
+
+
+class OutputError(AqpError): ...
+
+
+# prefix of the temporary files outputs are written to before replacing ``path``
+TEMP_PREFIX = ".aqp-"
+
+
+class OutputWriter(ABC):
+    """
+    Receives the cells of an executed config one at a time. ``header`` is the result ``dict``
+    of ``execute_config`` without the ``out`` key.
+
+    The output is written to a temporary file next to ``path``, which only replaces
+    ``path`` once ``close`` succeeds, so a failed run leaves a previous output intact.
+    """
+
+    def __init__(self, path: str | os.PathLike, header: dict[str, Any]) -> None:
+        self.path = path
+        self.header = header
+        self._temp_path = _create_temp_file(path)
+
+    @abstractmethod
+    def write(self, line_ind: int, file_ind: int, value: str) -> None:
+        """Writes the value of a single cell"""
+
+    @abstractmethod
+    def close(self) -> None:
+        """Finishes writing. The output is not guaranteed to be readable before this is called"""
+
+    def discard(self) -> None:
+        """Releases resources without finishing the output. Called instead of ``close`` on errors"""
+
+        if os.path.exists(self._temp_path):
+            os.remove(self._temp_path)
+
+    def _replace(self) -> None:
+        os.replace(self._temp_path, self.path)
+
+    def __enter__(self) -> "OutputWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+class JsonWriter(OutputWriter):
+    """Collects all cells in memory and dumps them as a single JSON document on ``close``"""
+
+    def __init__(self, path: str | os.PathLike, header: dict[str, Any]) -> None:
+        super().__init__(path, header)
+        self._out: dict[int, dict[int, str]] = {}
+
+    def write(self, line_ind: int, file_ind: int, value: str) -> None:
+        if line_ind not in self._out:
+            self._out[line_ind] = {}
+        self._out[line_ind][file_ind] = value
+
+    def close(self) -> None:
+        try:
+            with open(self._temp_path, "w") as file:
+                json.dump({**self.header, "out": self._out}, file, indent=4)
+            self._replace()
+        except BaseException:
+            self.discard()
+            raise
+
+
+_SQLITE_MAGIC = b"SQLite format 3\0"
+_SQLITE_BATCH_SIZE = 10_000
+
+
+class SqliteWriter(OutputWriter):
+    """
+    Writes cells into a ``cells(line, file, value)`` table. Inserts are batched with
+    ``executemany`` inside a single transaction, the index is built once all rows are in.
+    """
+
+    def __init__(self, path: str | os.PathLike, header: dict[str, Any]) -> None:
+        super().__init__(path, header)
+
+        self._connection = sqlite3.connect(self._temp_path, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode = OFF")
+        self._connection.execute("PRAGMA synchronous = OFF")
+        self._connection.execute("BEGIN")
+        self._connection.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._connection.execute(
+            "CREATE TABLE cells (line INTEGER NOT NULL, file INTEGER NOT NULL, value TEXT NOT NULL)"
+        )
+        self._connection.execute(
+            "INSERT INTO meta VALUES ('header', ?)", (json.dumps(header),)
+        )
+        self._batch: list[tuple[int, int, str]] = []
+
+    def write(self, line_ind: int, file_ind: int, value: str) -> None:
+        self._batch.append((line_ind, file_ind, value))
+        if len(self._batch) >= _SQLITE_BATCH_SIZE:
+            self._flush()
+
+    def _flush(self) -> None:
+        self._connection.executemany("INSERT INTO cells VALUES (?, ?, ?)", self._batch)
+        self._batch.clear()
+
+    def close(self) -> None:
+        try:
+            self._flush()
+            self._connection.execute(
+                "CREATE UNIQUE INDEX cells_line_file ON cells (line, file)"
+            )
+            self._connection.execute("COMMIT")
+            self._connection.close()
+            self._replace()
+        except BaseException:
+            self.discard()
+            raise
+
+    def discard(self) -> None:
+        self._connection.close()
+        super().discard()
+
+
+# Columnar layout (all integers little-endian):
+#   magic
+#   cell values, each a u32 byte length followed by UTF-8 bytes, in the order they were written
+#   index: for every file, ``line_count`` u64 offsets of its cells, ordered by line
+#   header JSON
+#   footer: index offset, header offset, header length, line count, file count, magic
+_COLUMNAR_MAGIC = b"AQPCOL1\0"
+_COLUMNAR_FOOTER = struct.Struct("<QQQII8s")
+_VALUE_LENGTH = struct.Struct("<I")
+_OFFSET = struct.Struct("<Q")
+_COLUMNAR_BUFFER_SIZE = 1 << 20
+
+
+class ColumnarWriter(OutputWriter):
+    """
+    Writes cells into a length-prefixed binary columnar file, which can be memory-mapped for
+    random access with ``ColumnarReader``. Cells of every file have to be written in line order.
+    """
+
+    def __init__(self, path: str | os.PathLike, header: dict[str, Any]) -> None:
+        super().__init__(path, header)
+        self._file: BinaryIO = open(
+            self._temp_path, "wb", buffering=_COLUMNAR_BUFFER_SIZE
+        )
+        self._file.write(_COLUMNAR_MAGIC)
+        self._offset = len(_COLUMNAR_MAGIC)
+        self._offsets: dict[int, array] = {}
+
+    def write(self, line_ind: int, file_ind: int, value: str) -> None:
+        offsets = self._offsets.get(file_ind)
+        if offsets is None:
+            offsets = self._offsets[file_ind] = array("Q")
+
+        if line_ind != len(offsets) + 1:
+            raise OutputError(
+                f"Cells of file {file_ind} are not written in line order: got line {line_ind}"
+            )
+
+        data = value.encode()
+        offsets.append(self._offset)
+        self._file.write(_VALUE_LENGTH.pack(len(data)))
+        self._file.write(data)
+        self._offset += _VALUE_LENGTH.size + len(data)
+
+    def close(self) -> None:
+        try:
+            file_count = max(self._offsets, default=0)
+            line_count = len(self._offsets[1]) if file_count else 0
+
+            index_offset = self._offset
+            for file_ind in range(1, file_count + 1):
+                offsets = self._offsets.get(file_ind, array("Q"))
+                if len(offsets) != line_count:
+                    raise OutputError(f"File {file_ind} is missing cells")
+                if sys.byteorder != "little":
+                    offsets.byteswap()
+                self._file.write(offsets.tobytes())
+
+            header = json.dumps(self.header).encode()
+            header_offset = index_offset + file_count * line_count * _OFFSET.size
+            self._file.write(header)
+            self._file.write(
+                _COLUMNAR_FOOTER.pack(
+                    index_offset,
+                    header_offset,
+                    len(header),
+                    line_count,
+                    file_count,
+                    _COLUMNAR_MAGIC,
+                )
+            )
+            self._file.close()
+            self._replace()
+        except BaseException:
+            self.discard()
+            raise
+
+    def discard(self) -> None:
+        self._file.close()
+        super().discard()
+
+
+class ColumnarReader:
+    """Random access reader for files written by ``ColumnarWriter``"""
+
+    def __init__(self, path: str | os.PathLike) -> None:
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if (
+            len(self._mmap) < len(_COLUMNAR_MAGIC) + _COLUMNAR_FOOTER.size
+            or self._mmap[: len(_COLUMNAR_MAGIC)] != _COLUMNAR_MAGIC
+        ):
+            self._mmap.close()
+            raise OutputError(f"{path} is not a columnar output file")
+
+        (
+            self._index_offset,
+            header_offset,
+            header_length,
+            self.line_count,
+            self.file_count,
+            magic,
+        ) = _COLUMNAR_FOOTER.unpack_from(
+            self._mmap, len(self._mmap) - _COLUMNAR_FOOTER.size
+        )
+
+        if magic != _COLUMNAR_MAGIC:
+            self._mmap.close()
+            raise OutputError(f"{path} is truncated")
+
+        self.header: dict[str, Any] = json.loads(
+            self._mmap[header_offset : header_offset + header_length]
+        )
+
+    def get(self, line_ind: int, file_ind: int) -> str:
+        """Returns the value of a single cell"""
+
+        if not (1 <= line_ind <= self.line_count and 1 <= file_ind <= self.file_count):
+            raise IndexError(f"No cell at line {line_ind} file {file_ind}")
+
+        index = (file_ind - 1) * self.line_count + (line_ind - 1)
+        (offset,) = _OFFSET.unpack_from(
+            self._mmap, self._index_offset + index * _OFFSET.size
+        )
+        (length,) = _VALUE_LENGTH.unpack_from(self._mmap, offset)
+        start = offset + _VALUE_LENGTH.size
+        return self._mmap[start : start + length].decode()
+
+    def cells(self) -> Iterator[tuple[int, int, str]]:
+        """Yields all cells as ``(line, file, value)``, row by row"""
+
+        for line_ind in range(1, self.line_count + 1):
+            for file_ind in range(1, self.file_count + 1):
+                yield line_ind, file_ind, self.get(line_ind, file_ind)
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def __enter__(self) -> "ColumnarReader":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+def _create_temp_file(path: str | os.PathLike) -> str:
+    # unlike mkstemp, creates the file with the permissions set by the umask, which the
+    # output keeps once it replaces ``path``
+    directory, name = os.path.split(os.path.abspath(path))
+    while True:
+        temp_path = os.path.join(
+            directory, f"{TEMP_PREFIX}{os.urandom(4).hex()}-{name}"
+        )
+        try:
+            with open(temp_path, "x"):
+                return temp_path
+        except FileExistsError:
+            continue
+
+
+def open_writer(
+    output_format: OutputFormat, path: str | os.PathLike, header: dict[str, Any]
+) -> OutputWriter:
+    """Returns a writer for ``output_format``"""
+
+    match output_format:
+        case OutputFormat.JSON:
+            return JsonWriter(path, header)
+        case OutputFormat.SQLITE:
+            return SqliteWriter(path, header)
+        case OutputFormat.COLUMNAR:
+            return ColumnarWriter(path, header)
+        case _:
+            raise OutputError(f"Unsupported output format {output_format}")
+
+
+def detect_format(path: str | os.PathLike) -> OutputFormat:
+    """Detects the format of an output file by its magic bytes"""
+
+    with open(path, "rb") as file:
+        start = file.read(len(_SQLITE_MAGIC))
+
+    if start.startswith(_SQLITE_MAGIC):
+        return OutputFormat.SQLITE
+    if start.startswith(_COLUMNAR_MAGIC):
+        return OutputFormat.COLUMNAR
+    return OutputFormat.JSON
+
+
+def load_output(path: str | os.PathLike) -> dict:
+    """Loads an output file of any format into the ``dict`` returned by ``execute_config``
+
+    Returns:
+        dict: result of executing the config
+    """
+
+    out: dict[int, dict[int, str]] = {}
+
+    match detect_format(path):
+        case OutputFormat.JSON:
+            with open(path) as file:
+                json_dict = json.load(file)
+            for line_ind, row in json_dict["out"].items():
+                out[int(line_ind)] = {
+                    int(file_ind): value for file_ind, value in row.items()
+                }
+            json_dict["out"] = out
+            return json_dict
+
+        case OutputFormat.SQLITE:
+            connection = sqlite3.connect(path)
+            try:
+                (header,) = connection.execute(
+                    "SELECT value FROM meta WHERE key = 'header'"
+                ).fetchone()
+                rows = connection.execute(
+                    "SELECT line, file, value FROM cells ORDER BY line, file"
+                )
+                for line_ind, file_ind, value in rows:
+                    if line_ind not in out:
+                        out[line_ind] = {}
+                    out[line_ind][file_ind] = value
+            finally:
+                connection.close()
+            return {**json.loads(header), "out": out}
+
+        case OutputFormat.COLUMNAR:
+            with ColumnarReader(path) as reader:
+                for line_ind, file_ind, value in reader.cells():
+                    if line_ind not in out:
+                        out[line_ind] = {}
+                    out[line_ind][file_ind] = value
+                return {**reader.header, "out": out}
+
+        case _:
+            raise OutputError(f"Unsupported output format for {path}")
@@ -1,4 +1,5 @@
-from typing import Optional, cast
+import sys
+from typing import Any, Optional
 
 from . import tokens
 from .config import Action, Config, FileMode
@@ -10,39 +11,50 @@ class ParserError(AqpError): ...
 
 
 class Parser:
+    """
+    Builds ``Config``s from the lexer's tokens. Identical ``#path:`` values are parsed once
+    per ``Parser`` and shared as the same interned tuple by every config using them.
+    """
+
+    PATH_SEPARATOR = ", "
+
     def __init__(self, lexer: Lexer) -> None:
         self._lexer = lexer
         self._configurations: dict[int, Config] = {}
-        self._current_config: Optional[Config] = None
+        self._current_id: Optional[int] = None
+        self._current_fields: dict[str, Any] = {}
+        self._paths: dict[str, tuple[str, ...]] = {}
 
     def parse(self) -> dict:
+        fields = self._current_fields
+        next_token = self._lexer.next_token
+
         while True:
-            tok = self._lexer.next_token()
+            tok = next_token()
 
             if not tok:
                 break
 
             if isinstance(tok, tokens.Id):
-                if self._current_config:
+                if self._current_id is not None:
                     self._build_current_config()
 
-                self._current_config = Config(config_id=tok.value)
+                self._current_id = tok.value
+                fields.clear()
                 continue
 
-            if self._current_config is None:
+            if self._current_id is None:
                 raise ParserError("No valid configuration found")
 
-            self._current_config = cast(Config, self._current_config)
-
             match tok:
                 case tokens.Path():
-                    self._current_config.action_path = tok.value.split(", ")
+                    fields["action_path"] = self._path_from_string(tok.value)
 
                 case tokens.Mode():
-                    self._current_config.mode = self._mode_from_string(tok.value)
+                    fields["mode"] = self._mode_from_string(tok.value)
 
                 case tokens.Action():
-                    self._current_config.action = self._action_from_string(tok.value)
+                    fields["action"] = self._action_from_string(tok.value)
 
                 case tokens.ErrorToken():
                     raise ParserError(f"{tok.text_pos}: {tok.error_message}")
@@ -53,6 +65,15 @@ class Parser:
         self._build_current_config()
         return self._configurations
 
+    def _path_from_string(self, path: str) -> tuple[str, ...]:
+        paths = self._paths.get(path)
+
+        if paths is None:
+            paths = tuple(sys.intern(elem) for elem in path.split(self.PATH_SEPARATOR))
+            self._paths[path] = paths
+
+        return paths
+
     def _mode_from_string(self, mode: str) -> FileMode:
         match mode:
             case "dir":
@@ -74,24 +95,26 @@ class Parser:
                 return Action.UNKNOWN
 
     def _build_current_config(self) -> None:
-        if self._current_config is None:
+        if self._current_id is None:
             raise ParserError("No valid configuration found")
 
         self._check_current_config()
-        self._configurations[self._current_config.config_id] = self._current_config
+        self._configurations[self._current_id] = Config(
+            config_id=self._current_id, **self._current_fields
+        )
 
     def _check_current_config(self) -> None:
-        assert self._current_config is not None  # assert for mypy
+        fields = self._current_fields
 
         missing_keys = []
 
-        if not self._current_config.action:
+        if not fields.get("action"):
             missing_keys.append("action")
 
-        if not self._current_config.mode:
+        if not fields.get("mode"):
             missing_keys.append("mode")
 
-        if not self._current_config.action_path:
+        if not fields.get("action_path"):
             missing_keys.append("path")
 
         if len(missing_keys) > 0:
@@ -0,0 +1,153 @@
+import os
+from dataclasses import dataclass
+from enum import StrEnum, auto
+from typing import Callable, Collection, Optional
+
+from .compression import Compression
+from .config import Action, Config
+from .formatting import format_size
+
+"""Execution planning: cost estimation and strategy selection for configs"""
+
+
+class Strategy(StrEnum):
+    SERIAL = auto()
+    FILE_PARALLEL = auto()
+    CHUNK_PARALLEL = auto()
+    STREAMING = auto()
+
+
+# rough single core throughput of each handler, in bytes of uncompressed input per second
+_THROUGHPUT = {
+    Action.STRING: 100 << 20,
+    Action.COUNT: 40 << 20,
+    Action.REPLACE: 10 << 20,
+}
+
+# expected uncompressed bytes per stored byte; decompression cost is folded into it
+_EXPANSION = {
+    Compression.NONE: 1,
+    Compression.GZIP: 6,
+    Compression.BZIP2: 8,
+    Compression.XZ: 8,
+    Compression.ZSTD: 6,
+}
+
+# jobs estimated to be cheaper than this aren't worth the pool startup overhead
+MIN_PARALLEL_COST = 0.5
+# jobs with more estimated input than this are streamed: files are handled in chunks with
+# a bounded number of them in flight, and large unsplittable files spill results to disk
+MEMORY_BUDGET = 512 << 20
+# uncompressed files larger than this are split into chunks of this size
+CHUNK_SIZE = 16 << 20
+
+
+@dataclass(frozen=True)
+class PlannedFile:
+    path: str | os.PathLike
+    size: int
+    key: tuple[int, int]
+    compression: Compression
+    mtime_ns: int = 0
+
+    @property
+    def estimated_size(self) -> int:
+        """Estimated size of the file after decompression"""
+
+        return self.size * _EXPANSION[self.compression]
+
+    @property
+    def splittable(self) -> bool:
+        return not self.compression and self.size > CHUNK_SIZE
+
+
+@dataclass(kw_only=True)
+class ExecutionPlan:
+    """Everything needed to execute a config, resolved before any data is read"""
+
+    config: Config
+    files: list[PlannedFile]
+    line_handler: Callable[[str, int], str]
+    file_dependent: bool
+    estimated_cost: float
+    strategy: Strategy
+    workers: int
+
+    @property
+    def total_size(self) -> int:
+        return sum(file.size for file in self.distinct_files())
+
+    @property
+    def estimated_size(self) -> int:
+        return sum(file.estimated_size for file in self.distinct_files())
+
+    def distinct_files(self) -> list[PlannedFile]:
+        """Files with duplicates removed, in order of first appearance"""
+
+        return _distinct(self.files)
+
+    def explain(self) -> str:
+        """Returns a human readable description of the plan"""
+
+        lines = [
+            f"configuration {self.config.config_id}: {len(self.files)} files "
+            f"({len(self.distinct_files())} distinct), {format_size(self.total_size)} "
+            f"on disk, ~{format_size(self.estimated_size)} to process",
+            f"action: {self.config.action} ({self.line_handler.__name__})",
+            f"estimated cost: {self.estimated_cost:.2f}s",
+            f"strategy: {self.strategy}"
+            + (
+                f" with {self.workers} workers"
+                if self.strategy != Strategy.SERIAL
+                else ""
+            ),
+        ]
+
+        for file_ind, file in enumerate(self.files, start=1):
+            compression = f" {file.compression}" if file.compression else ""
+            lines.append(
+                f"  {file_ind}: {file.path} {format_size(file.size)}{compression}"
+            )
+
+        return "\n".join(lines)
+
+
+def estimate_cost(files: Collection[PlannedFile], action: Action) -> float:
+    """Estimates the single core run time of processing ``files`` in seconds"""
+
+    distinct = _distinct(files)
+    return sum(file.estimated_size for file in distinct) / _THROUGHPUT[action]
+
+
+def choose_strategy(
+    files: Collection[PlannedFile], estimated_cost: float, workers: int
+) -> Strategy:
+    """Picks the strategy for processing ``files`` with up to ``workers`` processes"""
+
+    distinct = _distinct(files)
+    splittable = any(file.splittable for file in distinct)
+
+    if workers <= 1 or estimated_cost < MIN_PARALLEL_COST:
+        return Strategy.SERIAL
+
+    if sum(file.estimated_size for file in distinct) > MEMORY_BUDGET:
+        return Strategy.STREAMING
+
+    if len(distinct) <= 1 and not splittable:
+        return Strategy.SERIAL
+
+    if len(distinct) < workers and splittable:
+        return Strategy.CHUNK_PARALLEL
+
+    return Strategy.FILE_PARALLEL
+
+
+def default_workers(workers: Optional[int] = None) -> int:
+    return max(1, workers if workers is not None else (os.cpu_count() or 1))
+
+
+def _distinct(files: Collection[PlannedFile]) -> list[PlannedFile]:
+    distinct: dict[tuple[int, int], PlannedFile] = {}
+    for file in files:
+        distinct.setdefault(file.key, file)
+    return list(distinct.values())
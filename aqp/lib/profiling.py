@@ -0,0 +1,357 @@
+import cProfile
+import os
+import pstats
+import time
+import tracemalloc
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import StrEnum, auto
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+from .formatting import format_size
+
+"""Profiling of loading and execution, including the work done in worker processes"""
+
+T = TypeVar("T")
+
+
+class ProfileMode(StrEnum):
+    CPU = auto()
+    MEM = auto()
+
+
+@dataclass
+class WorkerProfile:
+    """Profile of a single call in a worker process, sent back to the parent for merging.
+    ``data`` is a ``pstats`` stats dict for CPU profiles and a list of
+    ``tracemalloc.Statistic`` for memory profiles."""
+
+    pid: int
+    data: Any
+    peak: int = 0
+
+
+class StageProfile(ABC):
+    """Profile of one stage, accumulated over every time the stage was entered"""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.elapsed = 0.0
+        self.worker_pids: set[int] = set()
+
+    @abstractmethod
+    def start(self) -> None: ...
+
+    @abstractmethod
+    def stop(self) -> None: ...
+
+    @abstractmethod
+    def add_worker(self, profile: WorkerProfile) -> None: ...
+
+    @abstractmethod
+    def write(self, output_dir: str | os.PathLike) -> list[str]:
+        """Writes the profile to ``output_dir``, returning the written paths"""
+
+    @abstractmethod
+    def top(self, count: int) -> list[str]:
+        """Returns summary lines of the ``count`` most expensive entries"""
+
+    def header(self) -> str:
+        header = f"{self.name}: {self.elapsed:.3f}s"
+        if self.worker_pids:
+            header += f", {len(self.worker_pids)} worker processes"
+        return header
+
+
+class CpuStageProfile(StageProfile):
+    """``cProfile`` of the stage, merged with the worker profiles into one ``pstats``"""
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.stats = pstats.Stats()
+        self._profile: Optional[cProfile.Profile] = None
+
+    def start(self) -> None:
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def stop(self) -> None:
+        assert self._profile is not None
+
+        self._profile.disable()
+        self.stats.add(self._profile)
+        self._profile = None
+
+    def add_worker(self, profile: WorkerProfile) -> None:
+        self.worker_pids.add(profile.pid)
+        self.stats.add(_stats_from_dict(profile.data))
+
+    def write(self, output_dir: str | os.PathLike) -> list[str]:
+        path = os.path.join(output_dir, f"{self.name}.pstats")
+        self.stats.dump_stats(path)
+        return [path]
+
+    def top(self, count: int) -> list[str]:
+        stats: dict = self.stats.stats  # type: ignore[attr-defined]
+        entries = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)
+
+        lines = []
+        for (file_name, line, function), (_, calls, total, cumulative, _) in entries[
+            :count
+        ]:
+            location = (
+                f"{os.path.basename(file_name)}:{line}({function})"
+                if line
+                else function
+            )
+            lines.append(
+                f"{cumulative:10.3f}s cum {total:10.3f}s own {calls:>10} calls  {location}"
+            )
+        return lines
+
+
+class MemoryStageProfile(StageProfile):
+    """``tracemalloc`` snapshot taken at the end of the stage. Worker allocations still
+    alive at the end of each worker call are merged into the summary by source line."""
+
+    TRACEBACK_LIMIT = 1
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.snapshots: list[tracemalloc.Snapshot] = []
+        self.peak = 0
+        self.worker_peak = 0
+        self._sizes: dict[tracemalloc.Traceback, list[int]] = {}
+        self._started_tracing = False
+
+    def start(self) -> None:
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start(self.TRACEBACK_LIMIT)
+        tracemalloc.reset_peak()
+
+    def stop(self) -> None:
+        snapshot = _take_snapshot()
+        self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+
+        if self._started_tracing:
+            tracemalloc.stop()
+
+        self.snapshots.append(snapshot)
+        self._add_statistics(snapshot.statistics("lineno"))
+
+    def add_worker(self, profile: WorkerProfile) -> None:
+        self.worker_pids.add(profile.pid)
+        self.worker_peak = max(self.worker_peak, profile.peak)
+        self._add_statistics(profile.data)
+
+    def write(self, output_dir: str | os.PathLike) -> list[str]:
+        paths = []
+        for ind, snapshot in enumerate(self.snapshots, start=1):
+            suffix = f".{ind}" if len(self.snapshots) > 1 else ""
+            path = os.path.join(output_dir, f"{self.name}{suffix}.snapshot")
+            snapshot.dump(path)
+            paths.append(path)
+        return paths
+
+    def top(self, count: int) -> list[str]:
+        entries = sorted(self._sizes.items(), key=lambda item: item[1][0], reverse=True)
+
+        lines = []
+        for traceback, (size, blocks) in entries[:count]:
+            frame = traceback[0]
+            location = f"{os.path.basename(frame.filename)}:{frame.lineno}"
+            lines.append(f"{format_size(size):>10} {blocks:>10} blocks  {location}")
+        return lines
+
+    def header(self) -> str:
+        header = super().header() + f", peak {format_size(self.peak)}"
+        if self.worker_pids:
+            header += f" (workers {format_size(self.worker_peak)})"
+        return header
+
+    def _add_statistics(self, statistics: list[tracemalloc.Statistic]) -> None:
+        for statistic in statistics:
+            sizes = self._sizes.setdefault(statistic.traceback, [0, 0])
+            sizes[0] += statistic.size
+            sizes[1] += statistic.count
+
+
+_STAGE_PROFILES: dict[ProfileMode, type[StageProfile]] = {
+    ProfileMode.CPU: CpuStageProfile,
+    ProfileMode.MEM: MemoryStageProfile,
+}
+
+
+class Profiler:
+    """
+    Collects a profile per stage. Stages are entered with ``stage``, a stage entered while
+    another one is running is counted towards the outer one. Profiles of worker processes
+    are merged into the stage that was running when they were added.
+    """
+
+    def __init__(self, mode: ProfileMode, top: int = 10) -> None:
+        self.mode = mode
+        self.top = top
+        self.stages: dict[str, StageProfile] = {}
+        self._current: Optional[StageProfile] = None
+        self._pid = os.getpid()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if self._current is not None:
+            yield
+            return
+
+        if name not in self.stages:
+            self.stages[name] = _STAGE_PROFILES[self.mode](name)
+
+        stage = self.stages[name]
+        self._current = stage
+        start = time.perf_counter()
+        stage.start()
+
+        try:
+            yield
+        finally:
+            stage.stop()
+            stage.elapsed += time.perf_counter() - start
+            self._current = None
+
+    def add_worker(self, profile: Optional[WorkerProfile]) -> None:
+        if profile is not None and self._current is not None:
+            self._current.add_worker(profile)
+
+    def write(self, output_dir: str | os.PathLike) -> list[str]:
+        """Writes a ``.pstats`` file per stage for CPU profiles, a ``tracemalloc``
+        ``.snapshot`` file per stage for memory profiles
+
+        Returns:
+            list[str]: written paths
+        """
+
+        os.makedirs(output_dir, exist_ok=True)
+        return [
+            path for stage in self.stages.values() for path in stage.write(output_dir)
+        ]
+
+    def summary(self) -> str:
+        lines = []
+        for stage in self.stages.values():
+            lines.append(stage.header())
+            lines.extend(f"  [{stage.name}] {line}" for line in stage.top(self.top))
+        return "\n".join(lines)
+
+    def _disable_inherited(self) -> None:
+        # a forked worker inherits the parent's running cProfile hook
+        if isinstance(self._current, CpuStageProfile) and self._current._profile:
+            self._current._profile.disable()
+        self._current = None
+
+
+_active: Optional[Profiler] = None
+
+
+@contextmanager
+def profile(
+    mode: ProfileMode | str,
+    output_dir: Optional[str | os.PathLike] = None,
+    *,
+    top: int = 10,
+) -> Iterator[Profiler]:
+    """Profiles loading and execution of configs inside the ``with`` block, including the
+    work done in worker processes. If ``output_dir`` is set, the profiles are written there
+    on exit. ``Profiler.summary`` lists the ``top`` most expensive entries of each stage.
+    """
+
+    global _active
+
+    if _active is not None:
+        raise RuntimeError("a profile is already active")
+
+    profiler = Profiler(ProfileMode(mode), top)
+    _active = profiler
+
+    try:
+        yield profiler
+    finally:
+        _active = None
+
+    if output_dir is not None:
+        profiler.write(output_dir)
+
+
+def active_profiler() -> Optional[Profiler]:
+    """Returns the profiler of the enclosing ``profile`` block of this process"""
+
+    if _active is None or _active._pid != os.getpid():
+        return None
+    return _active
+
+
+@contextmanager
+def stage(name: str) -> Iterator[Optional[Profiler]]:
+    """Counts the ``with`` block towards the stage ``name`` of the active profiler, if any"""
+
+    profiler = active_profiler()
+    if profiler is None:
+        yield None
+        return
+
+    with profiler.stage(name):
+        yield profiler
+
+
+def profile_call(
+    mode: ProfileMode, fn: Callable[..., T], *args: Any, **kwargs: Any
+) -> tuple[T, WorkerProfile]:
+    """Calls ``fn`` in a worker process under the profiler for ``mode``, returning its
+    result along with a ``WorkerProfile`` to pass to ``Profiler.add_worker``"""
+
+    global _active
+
+    if _active is not None and _active._pid != os.getpid():
+        _active._disable_inherited()
+        _active = None
+
+    if mode == ProfileMode.CPU:
+        cpu_profile = cProfile.Profile()
+        result = cpu_profile.runcall(fn, *args, **kwargs)
+        cpu_profile.create_stats()
+        return result, WorkerProfile(os.getpid(), cpu_profile.stats)  # type: ignore[attr-defined]
+
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(MemoryStageProfile.TRACEBACK_LIMIT)
+    else:
+        # forget allocations made before the call, including the parent's before forking
+        tracemalloc.clear_traces()
+    tracemalloc.reset_peak()
+
+    try:
+        result = fn(*args, **kwargs)
+        snapshot = _take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+
+    return result, WorkerProfile(os.getpid(), snapshot.statistics("lineno"), peak)
+
+
+def _take_snapshot() -> tracemalloc.Snapshot:
+    # leave out the profiler's own allocations
+    return tracemalloc.take_snapshot().filter_traces(
+        [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]
+    )
+
+
+def _stats_from_dict(data: dict) -> pstats.Stats:
+    stats = pstats.Stats()
+    stats.stats = data  # type: ignore[attr-defined]
+    stats.get_top_level_stats()  # type: ignore[attr-defined]
+    return stats
@@ -65,35 +65,46 @@ class Reader(ABC):
 
 
 class IoReader(Reader):
+    CHUNK_SIZE = 1 << 16
+
     def __init__(self, text_io: TextIO) -> None:
         super().__init__()
         self.text_io = text_io
         self.buffer = ""
+        # index of the current character in ``buffer``, consumed characters are only
+        # dropped when the buffer is refilled, so forwarding doesn't copy the buffer
+        self._start = 0
 
     def _fill_buffer(self, length: int) -> None:
+        if len(self.buffer) - self._start >= length:
+            return
+
+        self.buffer = self.buffer[self._start :]
+        self._start = 0
+
         while len(self.buffer) < length:
-            chunk = self.text_io.read(length - len(self.buffer))
+            chunk = self.text_io.read(max(length - len(self.buffer), self.CHUNK_SIZE))
             if not chunk:
                 break
             self.buffer += chunk
 
     def _forward_impl(self, length: int = 1) -> None:
         self._fill_buffer(length)
-        self.buffer = self.buffer[length:]
+        self._start = min(self._start + length, len(self.buffer))
 
     def prefix(self, length: int) -> str:
         self._fill_buffer(length)
-        return self.buffer[:length]
+        return self.buffer[self._start : self._start + length]
 
     def peek(self, position: int = 0) -> str:
         self._fill_buffer(position + 1)
-        if position < len(self.buffer):
-            return self.buffer[position]
+        if self._start + position < len(self.buffer):
+            return self.buffer[self._start + position]
         return Reader.EOF
 
     def eof(self, offset: int = 0) -> bool:
         self._fill_buffer(offset + 1)
-        return len(self.buffer) < (offset + 1)
+        return len(self.buffer) - self._start < (offset + 1)
 
 
 class StringReader(IoReader):
@@ -101,7 +112,7 @@ class StringReader(IoReader):
         super().__init__(StringIO(string))
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class FilePosition:
     """Represents a position inside a text file"""
 
@@ -0,0 +1,42 @@
+import os
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from .config import Config
+
+
+@dataclass
+class ConfigRegistry:
+    """
+    Configs loaded from several files, indexed by id. When several files define the same id,
+    the first one wins, and every file defining it is recorded in ``duplicates``.
+    """
+
+    configs: dict[int, Config] = field(default_factory=dict)
+    sources: dict[int, str | os.PathLike] = field(default_factory=dict)
+    duplicates: dict[int, list[str | os.PathLike]] = field(default_factory=dict)
+
+    def add(self, path: str | os.PathLike, configs: dict[int, Config]) -> None:
+        """Merges ``configs`` loaded from ``path``"""
+
+        for config_id, config in configs.items():
+            if config_id in self.configs:
+                if config_id not in self.duplicates:
+                    self.duplicates[config_id] = [self.sources[config_id]]
+                self.duplicates[config_id].append(path)
+                continue
+
+            self.configs[config_id] = config
+            self.sources[config_id] = path
+
+    def __getitem__(self, config_id: int) -> Config:
+        return self.configs[config_id]
+
+    def __contains__(self, config_id: object) -> bool:
+        return config_id in self.configs
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.configs)
+
+    def __len__(self) -> int:
+        return len(self.configs)
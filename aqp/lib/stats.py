@@ -0,0 +1,23 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class ExecutionStats:
+    """Counters collected while executing a config"""
+
+    files: int = 0
+    files_read: int = 0
+    files_cached: int = 0
+    memo_hits: int = 0
+    memo_misses: int = 0
+
+    @property
+    def duplicate_files(self) -> int:
+        return self.files - self.files_read - self.files_cached
+
+    def __str__(self) -> str:
+        return (
+            f"files: {self.files} ({self.files_read} read, {self.files_cached} cached, "
+            f"{self.duplicate_files} duplicate), "
+            f"memo: {self.memo_hits} hits, {self.memo_misses} misses"
+        )
@@ -9,32 +9,44 @@ from .reader import FilePosition
 
 
 class Token(ABC):
+    __slots__ = ("value", "text_pos")
+
     def __init__(self, value: Any, position: FilePosition = FilePosition()) -> None:
         self.value = value
         self.text_pos = position
 
 
 class Id(Token):
+    __slots__ = ()
+
     def __init__(self, value: int, position: FilePosition = FilePosition()) -> None:
         super().__init__(value, position)
 
 
 class Path(Token):
+    __slots__ = ()
+
     def __init__(self, value: str, position: FilePosition = FilePosition()) -> None:
         super().__init__(value, position)
 
 
 class Mode(Token):
+    __slots__ = ()
+
     def __init__(self, value: str, position: FilePosition = FilePosition()) -> None:
         super().__init__(value, position)
 
 
 class Action(Token):
+    __slots__ = ()
+
     def __init__(self, value: str, position: FilePosition = FilePosition()) -> None:
         super().__init__(value, position)
 
 
 class ErrorToken(Token):
+    __slots__ = ("error_message",)
+
     def __init__(
         self, error_message: str = "", position: FilePosition = FilePosition()
     ) -> None:
@@ -0,0 +1,409 @@
+import ctypes
+import ctypes.util
+import fnmatch
+import glob
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Collection, Optional
+
+from .cache import CACHE_SIZE, ColumnCache
+from .config import Config, FileMode
+from .error import AqpError
+from .functions import (
+    CONFIG_SUFFIX,
+    find_config_files,
+    load_many,
+    plan_config,
+    write_config,
+)
+from .output import TEMP_PREFIX, OutputFormat
+from .plan import Strategy
+from .stats import ExecutionStats
+
+"""Watch mode: re-executing a config when it or its data files change"""
+
+
+class WatchError(AqpError): ...
+
+
+class Watcher(ABC):
+    """Waits for changes of a set of files, and of any entries of a set of directories"""
+
+    def __init__(self) -> None:
+        self._files: frozenset[str] = frozenset()
+        self._dirs: frozenset[str] = frozenset()
+
+    def watch(self, files: Collection[str], dirs: Collection[str] = ()) -> None:
+        """Replaces the watched paths"""
+
+        self._files = frozenset(os.path.abspath(path) for path in files)
+        self._dirs = frozenset(os.path.abspath(path) for path in dirs)
+
+    @abstractmethod
+    def wait(self, timeout: Optional[float] = None) -> set[str]:
+        """Blocks until some of the watched paths change or ``timeout`` runs out.
+
+        Returns:
+            set[str]: changed paths, empty on timeout
+        """
+
+    def close(self) -> None: ...
+
+    def _is_relevant(self, path: str) -> bool:
+        return (
+            path in self._files
+            or path in self._dirs
+            or os.path.dirname(path) in self._dirs
+        )
+
+
+class PollingWatcher(Watcher):
+    """Compares ``stat`` results of the watched paths every ``interval`` seconds"""
+
+    def __init__(self, interval: float = 1.0) -> None:
+        super().__init__()
+        self.interval = interval
+        self._snapshot: dict[str, tuple[int, int, int]] = {}
+
+    def watch(self, files: Collection[str], dirs: Collection[str] = ()) -> None:
+        super().watch(files, dirs)
+        self._snapshot = self._take_snapshot()
+
+    def wait(self, timeout: Optional[float] = None) -> set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            snapshot = self._take_snapshot()
+            changed = {
+                path
+                for path in snapshot.keys() | self._snapshot.keys()
+                if snapshot.get(path) != self._snapshot.get(path)
+            }
+            self._snapshot = snapshot
+
+            if changed:
+                return changed
+
+            delay = self.interval
+            if deadline is not None:
+                delay = min(delay, deadline - time.monotonic())
+                if delay <= 0:
+                    return set()
+            time.sleep(delay)
+
+    def _take_snapshot(self) -> dict[str, tuple[int, int, int]]:
+        paths = set(self._files)
+        for dir_path in self._dirs:
+            try:
+                paths.update(
+                    os.path.join(dir_path, name) for name in os.listdir(dir_path)
+                )
+            except OSError:
+                continue
+
+        snapshot = {}
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+
+_IN_MODIFY = 0x2
+_IN_ATTRIB = 0x4
+_IN_CLOSE_WRITE = 0x8
+_IN_MOVED_FROM = 0x40
+_IN_MOVED_TO = 0x80
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_DELETE_SELF = 0x400
+_IN_MOVE_SELF = 0x800
+_IN_Q_OVERFLOW = 0x4000
+_IN_ONLYDIR = 0x1000000
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (
+    _IN_MODIFY
+    | _IN_ATTRIB
+    | _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+    | _IN_DELETE_SELF
+    | _IN_MOVE_SELF
+    | _IN_ONLYDIR
+)
+_EVENT = struct.Struct("iIII")
+_READ_SIZE = 64 << 10
+
+
+class InotifyWatcher(Watcher):
+    """
+    Linux inotify through ``ctypes``. Watches the parent directories of the watched files,
+    so files replaced by renaming are still noticed, and blocks in ``select`` without
+    using any CPU until something changes. Events arriving within ``debounce`` seconds of
+    each other are reported together, but never later than ``max_delay`` seconds after
+    the first of them, so a file that is written continuously is still reported.
+    """
+
+    def __init__(self, debounce: float = 0.1, max_delay: float = 1.0) -> None:
+        super().__init__()
+        self.debounce = debounce
+        self.max_delay = max_delay
+
+        if not sys.platform.startswith("linux"):
+            raise WatchError("inotify is only available on Linux")
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        try:
+            self._add_watch = libc.inotify_add_watch
+            self._rm_watch = libc.inotify_rm_watch
+            init = libc.inotify_init1
+        except AttributeError:
+            raise WatchError("libc has no inotify support") from None
+
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._rm_watch.argtypes = (ctypes.c_int, ctypes.c_int)
+
+        self._fd = init(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            raise WatchError(f"inotify_init1 failed: {os.strerror(ctypes.get_errno())}")
+
+        self._watches: dict[str, int] = {}
+        self._dirs_by_watch: dict[int, str] = {}
+
+    def watch(self, files: Collection[str], dirs: Collection[str] = ()) -> None:
+        super().watch(files, dirs)
+
+        wanted = {os.path.dirname(path) for path in self._files} | self._dirs
+
+        for dir_path in self._watches.keys() - wanted:
+            watch = self._watches.pop(dir_path)
+            self._dirs_by_watch.pop(watch, None)
+            self._rm_watch(self._fd, watch)
+
+        # a missing directory doesn't stop the others from being watched
+        errors = []
+        for dir_path in wanted - self._watches.keys():
+            watch = self._add_watch(self._fd, os.fsencode(dir_path), _WATCH_MASK)
+            if watch < 0:
+                errors.append(f"{dir_path}: {os.strerror(ctypes.get_errno())}")
+                continue
+            self._watches[dir_path] = watch
+            self._dirs_by_watch[watch] = dir_path
+
+        if errors:
+            raise WatchError(f"cannot watch {', '.join(sorted(errors))}")
+
+    def wait(self, timeout: Optional[float] = None) -> set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        changed: set[str] = set()
+        first_change = 0.0
+
+        while True:
+            now = time.monotonic()
+            remaining = None if deadline is None else deadline - now
+            if changed:
+                delay = min(self.debounce, first_change + self.max_delay - now)
+                remaining = delay if remaining is None else min(remaining, delay)
+
+            if remaining is not None and remaining <= 0:
+                return changed
+
+            readable, _, _ = select.select([self._fd], [], [], remaining)
+            if not readable:
+                return changed
+
+            events = self._read_events()
+            if events and not changed:
+                first_change = time.monotonic()
+            changed |= events
+
+    def _read_events(self) -> set[str]:
+        try:
+            data = os.read(self._fd, _READ_SIZE)
+        except BlockingIOError:
+            return set()
+
+        changed: set[str] = set()
+        offset = 0
+
+        while offset < len(data):
+            watch, mask, _, name_length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset : offset + name_length].rstrip(b"\0")
+            offset += name_length
+
+            if mask & _IN_Q_OVERFLOW:
+                # events were lost, report everything
+                changed |= self._files | self._dirs
+                continue
+
+            dir_path = self._dirs_by_watch.get(watch)
+            if dir_path is None:
+                continue
+
+            path = os.path.join(dir_path, os.fsdecode(name)) if name else dir_path
+            if self._is_relevant(path):
+                changed.add(path)
+
+        return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def make_watcher(poll_interval: float = 1.0) -> Watcher:
+    """Returns an ``InotifyWatcher`` where available, a ``PollingWatcher`` otherwise"""
+
+    try:
+        return InotifyWatcher()
+    except (WatchError, OSError):
+        return PollingWatcher(poll_interval)
+
+
+def watch(
+    config_path: str | os.PathLike,
+    config_id: int,
+    output_path: str | os.PathLike,
+    output_format: OutputFormat = OutputFormat.JSON,
+    *,
+    memo_size: int = 0,
+    cache_size: int = CACHE_SIZE,
+    watcher: Optional[Watcher] = None,
+    on_run: Optional[Callable[[Config, ExecutionStats], None]] = None,
+    on_error: Optional[Callable[[Exception], None]] = None,
+    stop: Optional[threading.Event] = None,
+) -> None:
+    """Executes a config and keeps re-executing it whenever its config file or data files
+    change, until ``stop`` is set. ``config_path`` is anything ``find_config_files``
+    accepts. The config is only re-parsed when a config file changes, and only data files
+    whose inode, size or modification time changed are read again, as long as the handled
+    columns of the others fit in ``cache_size`` bytes. The output is replaced atomically
+    after every run, and ``on_run`` is called with the run's statistics.
+
+    A run that fails with an ``AqpError`` or ``OSError`` is passed to ``on_error``
+    (printed to stderr by default) and doesn't end watching: the last config that loaded
+    keeps being used and its last output is kept until the next successful run.
+    """
+
+    own_watcher = watcher is None
+    watcher = watcher if watcher is not None else make_watcher()
+    cache = ColumnCache(cache_size)
+    config: Optional[Config] = None
+    reload = True
+    output_path = os.path.abspath(output_path)
+    on_error = on_error if on_error is not None else _print_error
+
+    # absolute, so changed paths can be matched against it
+    config_pattern = os.path.abspath(config_path)
+    if os.path.isdir(config_pattern):
+        config_pattern = os.path.join(glob.escape(config_pattern), "*" + CONFIG_SUFFIX)
+
+    try:
+        while stop is None or not stop.is_set():
+            config_paths = find_config_files(config_pattern)
+            # where config files matching the pattern can be added
+            config_dirs = _glob_dirs(config_pattern)
+
+            try:
+                if reload:
+                    reload = False
+                    config = _load_config(config_paths, config_id)
+            except (AqpError, OSError) as error:
+                on_error(error)
+
+            try:
+                # watching starts before the run, so changes made during it aren't missed
+                data_files, data_dirs = (
+                    _watched_data_paths(config) if config is not None else ([], [])
+                )
+                watcher.watch([*config_paths, *data_files], [*config_dirs, *data_dirs])
+
+                if config is not None:
+                    plan = plan_config(config, strategy=Strategy.SERIAL)
+                    stats = ExecutionStats()
+                    # replaced only if the run succeeds
+                    write_config(
+                        plan,
+                        output_path,
+                        output_format,
+                        memo_size=memo_size,
+                        stats=stats,
+                        cache=cache,
+                    )
+
+                    if on_run is not None:
+                        on_run(config, stats)
+            except (AqpError, OSError) as error:
+                on_error(error)
+
+            changed: set[str] = set()
+            while not changed and (stop is None or not stop.is_set()):
+                changed = watcher.wait(timeout=0.5 if stop is not None else None)
+                changed -= {output_path}
+                changed = {
+                    path
+                    for path in changed
+                    if not os.path.basename(path).startswith(TEMP_PREFIX)
+                }
+
+            if any(
+                path in config_paths or _matches(path, config_pattern)
+                for path in changed
+            ):
+                reload = True
+    finally:
+        if own_watcher:
+            watcher.close()
+
+
+def _load_config(config_paths: list[str], config_id: int) -> Config:
+    registry = load_many(config_paths)
+    if config_id not in registry:
+        raise WatchError(f"configuration {config_id} not found")
+    return registry[config_id]
+
+
+def _glob_dirs(pattern: str) -> list[str]:
+    if not glob.has_magic(pattern):
+        return []
+
+    dir_pattern = os.path.dirname(pattern)
+    if not glob.has_magic(dir_pattern):
+        return [dir_pattern]
+    return sorted(path for path in glob.glob(dir_pattern) if os.path.isdir(path))
+
+
+def _matches(path: str, pattern: str) -> bool:
+    # like glob, wildcards don't match across directories
+    parts = path.split(os.sep)
+    pattern_parts = pattern.split(os.sep)
+    return len(parts) == len(pattern_parts) and all(
+        fnmatch.fnmatchcase(part, pattern_part)
+        for part, pattern_part in zip(parts, pattern_parts)
+    )
+
+
+def _print_error(error: Exception) -> None:
+    print(f"error: {error}", file=sys.stderr)
+
+
+def _watched_data_paths(config: Config) -> tuple[list[str], list[str]]:
+    assert config.action_path is not None
+
+    paths = [os.fspath(path) for path in config.action_path]
+    if config.mode == FileMode.DIR:
+        return [], paths
+    return paths, []
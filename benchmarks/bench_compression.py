@@ -0,0 +1,67 @@
+"""Compares execute_config throughput on compressed data files against plain ones.
+
+Usage: python benchmarks/bench_compression.py [line_count]
+"""
+
+import bz2
+import gzip
+import lzma
+import os
+import sys
+import tempfile
+import time
+from typing import Callable
+
+from aqp import Action, Config, FileMode, execute_config
+
+COMPRESSORS: list[tuple[str, Callable[[bytes], bytes]]] = [
+    ("plain", lambda data: data),
+    ("gz", gzip.compress),
+    ("bz2", bz2.compress),
+    ("xz", lzma.compress),
+]
+
+
+def make_log(line_count: int) -> bytes:
+    lines = (
+        f"2024-01-01T00:00:{ind % 60:02d} worker-{ind % 16} handled request {ind}\n"
+        for ind in range(line_count)
+    )
+    return "".join(lines).encode()
+
+
+def bench(path: str, repeat: int = 3) -> float:
+    config = Config(
+        config_id=1, mode=FileMode.FILES, action=Action.COUNT, action_path=[path]
+    )
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        execute_config(config)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    line_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    data = make_log(line_count)
+    size_mb = len(data) / (1 << 20)
+
+    print(f"{line_count} lines, {size_mb:.1f} MiB uncompressed")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for name, compress in COMPRESSORS:
+            path = os.path.join(temp_dir, f"data.{name}")
+            with open(path, "wb") as file:
+                file.write(compress(data))
+
+            seconds = bench(path)
+            print(
+                f"{name:>6}: {seconds:.3f}s, {size_mb / seconds:.1f} MiB/s, "
+                f"{os.path.getsize(path) / (1 << 20):.1f} MiB on disk"
+            )
+
+
+if __name__ == "__main__":
+    main()
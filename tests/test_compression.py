@@ -0,0 +1,96 @@
+import bz2
+import gzip
+import lzma
+import pathlib
+from typing import Callable
+
+import pytest
+
+from aqp import Action, Config, FileMode, execute_config
+from aqp.lib.compression import Compression, detect_compression, open_data_file
+
+CONTENTS = "hello world\nthis is a test\n"
+
+compressors: list[tuple[Compression, str, Callable[[bytes], bytes]]] = [
+    (Compression.GZIP, ".gz", gzip.compress),
+    (Compression.BZIP2, ".bz2", bz2.compress),
+    (Compression.XZ, ".xz", lzma.compress),
+]
+
+
+@pytest.mark.parametrize("compression, suffix, compress", compressors)
+def test_detect_compression_by_magic(
+    tmp_path: pathlib.Path,
+    compression: Compression,
+    suffix: str,
+    compress: Callable[[bytes], bytes],
+) -> None:
+    path = tmp_path / "file.log"
+    path.write_bytes(compress(CONTENTS.encode()))
+
+    assert detect_compression(path) == compression
+
+    with open_data_file(path) as file:
+        assert file.read() == CONTENTS
+
+
+def test_detect_compression_plain(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "file.gz"
+    path.write_text(CONTENTS)
+
+    assert detect_compression(path) == Compression.NONE
+
+
+def test_detect_compression_text_like_magic(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "file.log"
+    path.write_text("BZh9 is a bzip2 header\n" + CONTENTS)
+
+    assert detect_compression(path) == Compression.NONE
+
+    empty = tmp_path / "empty.log"
+    empty.write_bytes(bz2.compress(b""))
+
+    assert detect_compression(empty) == Compression.BZIP2
+
+
+@pytest.mark.parametrize("suffix", [".gz", ".bz2", ".xz", ".zst"])
+def test_short_files_with_compression_extension(
+    tmp_path: pathlib.Path, suffix: str
+) -> None:
+    # e.g. a log that was just rotated and hasn't been compressed yet
+    empty = tmp_path / f"empty.log{suffix}"
+    empty.write_bytes(b"")
+    short = tmp_path / f"short.log{suffix}"
+    short.write_text("ab\n")
+
+    assert detect_compression(empty) == Compression.NONE
+    with open_data_file(short) as file:
+        assert file.read() == "ab\n"
+
+    config = Config(
+        config_id=1,
+        mode=FileMode.FILES,
+        action=Action.COUNT,
+        action_path=[str(empty), str(short)],
+    )
+    assert execute_config(config)["out"] == {1: {1: "0", 2: "1"}}
+
+
+def test_execute_config_compressed(tmp_path: pathlib.Path) -> None:
+    plain = tmp_path / "plain.txt"
+    plain.write_text(CONTENTS)
+
+    paths = [str(plain)]
+    for _, suffix, compress in compressors:
+        path = tmp_path / f"file.txt{suffix}"
+        path.write_bytes(compress(CONTENTS.encode()))
+        paths.append(str(path))
+
+    config = Config(
+        config_id=1, mode=FileMode.FILES, action=Action.COUNT, action_path=paths
+    )
+
+    assert execute_config(config)["out"] == {
+        1: {1: "2", 2: "2", 3: "2", 4: "2"},
+        2: {1: "4", 2: "4", 3: "4", 4: "4"},
+    }
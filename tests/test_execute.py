@@ -1,3 +1,4 @@
+import dataclasses
 import os
 from itertools import product
 
@@ -7,9 +8,15 @@ from pyfakefs.fake_filesystem import FakeFilesystem
 from aqp import (
     Action,
     Config,
+    ExecutionStats,
     FileMode,
+    Strategy,
     execute_config,
+    iter_rows,
+    plan_config,
 )
+from aqp.lib import functions
+from aqp.lib.cache import ColumnCache
 
 file_modes = [FileMode.FILES, FileMode.DIR]
 
@@ -73,3 +80,139 @@ def test_execute_config(
     assert result["configFile"] == config.path_to_config
     assert result["configurationData"]["mode"] == str(config.mode)
     assert result["configurationData"]["path"] == ", ".join(action_path)
+
+
+@pytest.mark.parametrize("action", [Action.STRING, Action.REPLACE])
+def test_execute_config_duplicate_files(fs: FakeFilesystem, action: Action) -> None:
+    fs.create_file("/data/file1.txt", contents="a\nb\n")
+    fs.create_file("/data/file2.txt", contents="c\n")
+    fs.create_symlink("/data/link.txt", "/data/file1.txt")
+    fs.create_link("/data/file1.txt", "/hard_link.txt")
+
+    config = Config(
+        config_id=1,
+        mode=FileMode.FILES,
+        action=action,
+        action_path=[
+            "/data/file1.txt",
+            "/data/file2.txt",
+            "/data/link.txt",
+            "/data/file1.txt",
+            "/hard_link.txt",
+        ],
+    )
+
+    stats = ExecutionStats()
+    result = execute_config(config, stats=stats)
+
+    assert stats.files == 5
+    assert stats.files_read == 2
+
+    if action == Action.STRING:
+        assert result["out"] == {
+            1: {1: "a", 2: "c", 3: "a", 4: "a", 5: "a"},
+            2: {1: "b", 2: "", 3: "b", 4: "b", 5: "b"},
+        }
+    else:
+        assert result["out"] == {
+            1: {1: "11", 2: "32", 3: "13", 4: "14", 5: "15"},
+            2: {1: "21", 2: "", 3: "23", 4: "24", 5: "25"},
+        }
+
+
+@pytest.mark.parametrize("action", list(Action)[1:])
+def test_execute_config_memo(fs: FakeFilesystem, action: Action) -> None:
+    fs.create_file("/file1.txt", contents="a b\n" * 5 + "c\n")
+    fs.create_file("/file2.txt", contents="a b\n" * 3)
+
+    config = Config(
+        config_id=1,
+        mode=FileMode.FILES,
+        action=action,
+        action_path=["/file1.txt", "/file2.txt"],
+    )
+
+    stats = ExecutionStats()
+    result = execute_config(config, memo_size=16, stats=stats)
+
+    assert result == execute_config(config)
+
+    if action == Action.REPLACE:
+        # keyed by file number, so each file misses on its first distinct lines
+        assert (stats.memo_hits, stats.memo_misses) == (6, 4)
+    else:
+        assert (stats.memo_hits, stats.memo_misses) == (7, 3)
+
+
+def test_iter_rows(fs: FakeFilesystem) -> None:
+    fs.create_file("/file1.txt", contents="a\nb\nc\n")
+    fs.create_file("/file2.txt", contents="d\n")
+    fs.create_file("/file3.txt", contents="")
+
+    config = Config(
+        config_id=1,
+        mode=FileMode.FILES,
+        action=Action.REPLACE,
+        action_path=["/file1.txt", "/file2.txt", "/file3.txt"],
+    )
+    plan = plan_config(config, strategy=Strategy.SERIAL)
+
+    empty_calls = []
+
+    def handle_line(line: str, file_number: int) -> str:
+        if not line:
+            empty_calls.append(file_number)
+        return f"{line}{file_number}"
+
+    plan = dataclasses.replace(plan, line_handler=handle_line)
+
+    assert list(iter_rows(plan)) == [
+        ("a1", "d2", "3"),
+        ("b1", "2", "3"),
+        ("c1", "2", "3"),
+    ]
+    # computed once per file that runs short, not once per padded cell
+    assert empty_calls == [2, 3]
+
+
+@pytest.mark.parametrize("max_open", [1, 16])
+@pytest.mark.parametrize("action", list(Action)[1:])
+def test_iter_rows_batches(
+    fs: FakeFilesystem,
+    monkeypatch: pytest.MonkeyPatch,
+    action: Action,
+    max_open: int,
+) -> None:
+    monkeypatch.setattr(functions, "_BATCH_LINES", 2)
+    monkeypatch.setattr(functions, "default_max_open", lambda: max_open)
+
+    fs.create_file("/data/file1.txt", contents="a b\nc\nd e f\ng\nh\n")
+    fs.create_file("/data/file2.txt", contents="i j\nk\n")
+    fs.create_file("/data/file3.txt", contents="l\nm n\no\n")
+    fs.create_file("/data/file4.txt", contents="")
+
+    config = Config(
+        config_id=1,
+        mode=FileMode.FILES,
+        action=action,
+        action_path=[
+            "/data/file1.txt",
+            "/data/file2.txt",
+            "/data/file3.txt",
+            "/data/file2.txt",
+            "/data/file4.txt",
+        ],
+    )
+
+    stats = ExecutionStats()
+    rows = list(iter_rows(config, stats=stats))
+
+    assert (stats.files, stats.files_read) == (5, 4)
+
+    # the cache makes execute_config go through the file by file executor
+    expected = execute_config(config, cache=ColumnCache())["out"]
+    assert rows == [
+        tuple(cells[file_ind] for file_ind in sorted(cells))
+        for cells in expected.values()
+    ]
+    assert execute_config(config)["out"] == expected
@@ -0,0 +1,195 @@
+import dataclasses
+import gzip
+import os
+import pathlib
+import resource
+import subprocess
+import sys
+from typing import Iterator, TextIO
+
+import pytest
+
+import aqp
+from aqp import (
+    Action,
+    Config,
+    FileMode,
+    Strategy,
+    execute_config,
+    iter_rows,
+    plan_config,
+)
+from aqp.lib import filepool, functions
+from aqp.lib.compression import open_data_file
+from aqp.lib.filepool import FilePool, default_max_open
+
+FILE_COUNT = 300
+LINE_COUNT = 5
+
+
+def make_files(directory: pathlib.Path, file_count: int = FILE_COUNT) -> None:
+    for ind in range(file_count):
+        lines = "".join(
+            f"file {ind} line {line}\n" for line in range(LINE_COUNT + ind % 3)
+        )
+        if ind % 10 == 0:
+            (directory / f"{ind:04}.txt.gz").write_bytes(gzip.compress(lines.encode()))
+        else:
+            (directory / f"{ind:04}.txt").write_text(lines)
+
+
+@pytest.fixture
+def low_nofile_limit() -> Iterator[int]:
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    limit = 64
+    resource.setrlimit(resource.RLIMIT_NOFILE, (limit, hard))
+    yield limit
+    resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+
+
+def test_file_pool_reopens_at_offset(tmp_path: pathlib.Path) -> None:
+    make_files(tmp_path, 20)
+    paths = sorted(tmp_path.iterdir())
+
+    with FilePool(max_open=4) as pool:
+        batches: dict[pathlib.Path, list[str]] = {path: [] for path in paths}
+        for _ in range(LINE_COUNT + 3):
+            for path in paths:
+                batches[path] += pool.read_lines(path, 1)
+                assert pool.open_count <= 4
+
+        assert pool.reopen_count > 0
+
+    for path in paths:
+        with open_data_file(path) as file:
+            assert batches[path] == file.read().splitlines()
+
+
+def test_file_pool_decompresses_once(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    make_files(tmp_path, 40)
+    paths = sorted(tmp_path.iterdir())
+    compressed = [path for path in paths if path.suffix == ".gz"]
+
+    opened: list[pathlib.Path] = []
+
+    def counting_open(path: pathlib.Path, buffer_size: int) -> TextIO:
+        opened.append(path)
+        return open_data_file(path, buffer_size)
+
+    monkeypatch.setattr(filepool, "open_data_file", counting_open)
+
+    with FilePool(max_open=4) as pool:
+        batches: dict[pathlib.Path, list[str]] = {path: [] for path in paths}
+        for _ in range(LINE_COUNT + 3):
+            for path in paths:
+                batches[path] += pool.read_lines(path, 1)
+
+        # round robin evicts every file on every pass, compressed ones are only
+        # decompressed once and read back from a temporary copy afterwards
+        assert pool.decompress_count == len(compressed)
+        assert all(opened.count(path) == 1 for path in compressed)
+
+    for path in paths:
+        with open_data_file(path) as file:
+            assert batches[path] == file.read().splitlines()
+
+
+def test_default_max_open(low_nofile_limit: int) -> None:
+    assert default_max_open() == low_nofile_limit // 4
+
+
+def test_streaming_under_low_nofile_limit(
+    tmp_path: pathlib.Path, low_nofile_limit: int
+) -> None:
+    make_files(tmp_path)
+    config = Config(
+        config_id=1, mode=FileMode.DIR, action=Action.COUNT, action_path=[str(tmp_path)]
+    )
+
+    expected = execute_config(plan_config(config, strategy=Strategy.SERIAL))
+    result = execute_config(plan_config(config, strategy=Strategy.STREAMING, workers=1))
+
+    assert len(result["out"][1]) == FILE_COUNT
+    assert result == expected
+
+
+def test_iter_rows_under_low_nofile_limit(
+    tmp_path: pathlib.Path, low_nofile_limit: int, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    make_files(tmp_path)
+    config = Config(
+        config_id=1, mode=FileMode.DIR, action=Action.COUNT, action_path=[str(tmp_path)]
+    )
+
+    pools: list[FilePool] = []
+
+    class RecordingPool(FilePool):
+        def __init__(self) -> None:
+            super().__init__()
+            pools.append(self)
+
+    monkeypatch.setattr(functions, "FilePool", RecordingPool)
+    # several batches per file, so files are evicted and reopened at an offset
+    monkeypatch.setattr(functions, "_BATCH_LINES", 2)
+
+    expected = execute_config(plan_config(config, strategy=Strategy.SERIAL))["out"]
+    rows = list(iter_rows(config))
+
+    # every file is read through one pool that stays within the limit
+    assert len(pools) == 1
+    assert pools[0].max_open < low_nofile_limit
+    assert pools[0].reopen_count > 0
+
+    assert len(rows) == len(expected)
+    assert all(len(row) == FILE_COUNT for row in rows)
+    assert {
+        line_ind: dict(enumerate(row, start=1))
+        for line_ind, row in enumerate(rows, start=1)
+    } == expected
+
+
+def test_cli_under_ulimit(tmp_path: pathlib.Path) -> None:
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    make_files(data_dir)
+
+    config_path = tmp_path / "config.aqc"
+    config_path.write_text(f"#1\n#mode: dir\n#path: {data_dir}\n#action: replace\n")
+    output_path = tmp_path / "out.sqlite"
+
+    def lower_limit() -> None:
+        _, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (64, hard))
+
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.path.dirname(os.path.dirname(aqp.__file__)),
+    }
+    subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "aqp.cli",
+            str(config_path),
+            "1",
+            "--strategy",
+            "streaming",
+            "--workers",
+            "2",
+            "-f",
+            "sqlite",
+            "-o",
+            str(output_path),
+        ],
+        check=True,
+        env=env,
+        preexec_fn=lower_limit,
+    )
+
+    with open(config_path) as file:
+        config = aqp.load(file)[1]
+    config = dataclasses.replace(config, path_to_config=str(config_path))
+
+    assert aqp.load_output(output_path) == execute_config(config)
@@ -0,0 +1,132 @@
+import dataclasses
+import pathlib
+import sqlite3
+
+import pytest
+
+from aqp import (
+    Action,
+    Config,
+    FileMode,
+    OutputFormat,
+    execute_config,
+    load_output,
+    plan_config,
+    write_config,
+)
+from aqp.lib.output import (
+    ColumnarReader,
+    ColumnarWriter,
+    OutputError,
+    SqliteWriter,
+)
+
+
+@pytest.fixture
+def config(tmp_path: pathlib.Path) -> Config:
+    file1 = tmp_path / "file1.txt"
+    file2 = tmp_path / "file2.txt"
+    file1.write_text("hello world\nthis is a test\nthird line\n")
+    file2.write_text("pytest is great\n")
+
+    return Config(
+        config_id=1,
+        path_to_config="/path/to/config",
+        mode=FileMode.FILES,
+        action=Action.REPLACE,
+        action_path=[str(file1), str(file2)],
+    )
+
+
+@pytest.mark.parametrize("output_format", list(OutputFormat))
+def test_output_round_trip(
+    tmp_path: pathlib.Path, config: Config, output_format: OutputFormat
+) -> None:
+    output_path = tmp_path / f"out{output_format.suffix}"
+
+    write_config(config, output_path, output_format)
+
+    assert load_output(output_path) == execute_config(config)
+
+
+def test_columnar_random_access(tmp_path: pathlib.Path, config: Config) -> None:
+    output_path = tmp_path / "out.aqpc"
+    write_config(config, output_path, OutputFormat.COLUMNAR)
+
+    with ColumnarReader(output_path) as reader:
+        assert reader.line_count == 3
+        assert reader.file_count == 2
+        assert reader.get(2, 1) == "this is 11 test"
+        assert reader.get(1, 2) == "pytest is gre12t"
+        assert reader.get(3, 2) == ""
+        assert reader.header["configurationId"] == 1
+
+        with pytest.raises(IndexError):
+            reader.get(4, 1)
+
+
+def test_columnar_out_of_order(tmp_path: pathlib.Path) -> None:
+    writer = ColumnarWriter(tmp_path / "out.aqpc", {})
+    writer.write(1, 1, "first")
+
+    with pytest.raises(OutputError):
+        writer.write(3, 1, "third")
+
+    writer.discard()
+    assert not (tmp_path / "out.aqpc").exists()
+
+
+def test_writer_discards_on_error(tmp_path: pathlib.Path, config: Config) -> None:
+    config = dataclasses.replace(
+        config,
+        action_path=[*config.action_path, str(tmp_path / "missing.txt")],  # type: ignore
+    )
+    output_path = tmp_path / "out.sqlite"
+
+    with pytest.raises(FileNotFoundError):
+        write_config(config, output_path, OutputFormat.SQLITE)
+
+    assert not output_path.exists()
+
+
+@pytest.mark.parametrize("output_format", list(OutputFormat))
+def test_failed_run_keeps_previous_output(
+    tmp_path: pathlib.Path, config: Config, output_format: OutputFormat
+) -> None:
+    output_path = tmp_path / f"out{output_format.suffix}"
+    write_config(config, output_path, output_format)
+    expected = load_output(output_path)
+
+    # fails once the output is being written
+    plan = plan_config(config)
+    (tmp_path / "file2.txt").unlink()
+    with pytest.raises(FileNotFoundError):
+        write_config(plan, output_path, output_format)
+
+    assert load_output(output_path) == expected
+    # no temporary files left behind
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "file1.txt",
+        output_path.name,
+    ]
+
+
+def test_writer_discards_on_failed_close(tmp_path: pathlib.Path) -> None:
+    sqlite_writer = SqliteWriter(tmp_path / "out.sqlite", {})
+    sqlite_writer.write(1, 1, "first")
+    sqlite_writer.write(1, 1, "again")
+
+    with pytest.raises(sqlite3.IntegrityError):
+        sqlite_writer.close()
+
+    assert not (tmp_path / "out.sqlite").exists()
+
+    columnar_writer = ColumnarWriter(tmp_path / "out.aqpc", {})
+    columnar_writer.write(1, 1, "first")
+    columnar_writer.write(1, 2, "second")
+    columnar_writer.write(2, 1, "third")
+
+    with pytest.raises(OutputError):
+        columnar_writer.close()
+
+    assert not (tmp_path / "out.aqpc").exists()
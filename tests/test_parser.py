@@ -1,3 +1,5 @@
+import dataclasses
+
 import pytest
 from pytest_mock import MockerFixture
 
@@ -27,7 +29,7 @@ def test_parser_valid(mocker: MockerFixture) -> None:
 
     assert 1 in result
     config = result[1]
-    assert config.action_path == ["/path/to/file", "/another/path"]
+    assert config.action_path == ("/path/to/file", "/another/path")
     assert config.mode == FileMode.FILES
     assert config.action == ConfigAction.COUNT
 
@@ -72,10 +74,10 @@ def test_parser_multiple_configs(mocker: MockerFixture) -> None:
 
     assert 1 in result
     assert 2 in result
-    assert result[1].action_path == ["/first/path"]
+    assert result[1].action_path == ("/first/path",)
     assert result[1].mode == FileMode.FILES
     assert result[1].action == ConfigAction.COUNT
-    assert result[2].action_path == ["/second/path"]
+    assert result[2].action_path == ("/second/path",)
     assert result[2].mode == FileMode.DIR
     assert result[2].action == ConfigAction.REPLACE
 
@@ -94,3 +96,38 @@ def test_parser_partial_config(mocker: MockerFixture) -> None:
 
     with pytest.raises(ParserError):
         parser.parse()
+
+
+def test_parser_shares_paths(mocker: MockerFixture) -> None:
+    tokens = [
+        Id(1),
+        Path("/shared/path, /other/path"),
+        Mode("files"),
+        Action("count"),
+        Id(2),
+        Path("/shared/path, /other/path"),
+        Mode("files"),
+        Action("string"),
+    ]
+    parser = create_parser(mocker, tokens)
+    result = parser.parse()
+
+    assert result[1].action_path is result[2].action_path
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        result[1].mode = FileMode.DIR  # type: ignore
+
+
+def test_parser_fields_not_carried_over(mocker: MockerFixture) -> None:
+    tokens = [
+        Id(1),
+        Path("/first/path"),
+        Mode("files"),
+        Action("count"),
+        Id(2),
+        Path("/second/path"),
+    ]
+    parser = create_parser(mocker, tokens)
+
+    with pytest.raises(ParserError):
+        parser.parse()
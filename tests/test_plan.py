@@ -0,0 +1,131 @@
+import gzip
+import pathlib
+
+import pytest
+
+from aqp import (
+    Action,
+    Config,
+    ExecutionStats,
+    FileMode,
+    Strategy,
+    execute_config,
+    plan_config,
+)
+from aqp.lib import functions, plan
+from aqp.lib.compression import Compression
+from aqp.lib.plan import PlannedFile, choose_strategy, estimate_cost
+
+
+def planned_file(
+    ind: int, size: int, compression: Compression = Compression.NONE
+) -> PlannedFile:
+    return PlannedFile(
+        path=f"/file{ind}", size=size, key=(0, ind), compression=compression
+    )
+
+
+def choose(files: list[PlannedFile], workers: int = 8) -> Strategy:
+    return choose_strategy(files, estimate_cost(files, Action.COUNT), workers)
+
+
+def test_choose_strategy_small_job() -> None:
+    assert choose([planned_file(ind, 1 << 10) for ind in range(100)]) == Strategy.SERIAL
+
+
+def test_choose_strategy_single_worker() -> None:
+    files = [planned_file(ind, 64 << 20) for ind in range(4)]
+    assert choose(files, workers=1) == Strategy.SERIAL
+
+
+def test_choose_strategy_many_files() -> None:
+    files = [planned_file(ind, 4 << 20) for ind in range(20)]
+    assert choose(files) == Strategy.FILE_PARALLEL
+
+
+def test_choose_strategy_few_large_files() -> None:
+    files = [planned_file(ind, 128 << 20) for ind in range(2)]
+    assert choose(files) == Strategy.CHUNK_PARALLEL
+
+
+def test_choose_strategy_single_compressed_file() -> None:
+    files = [planned_file(1, 64 << 20, Compression.GZIP)]
+    assert choose(files) == Strategy.SERIAL
+
+
+def test_choose_strategy_large_input() -> None:
+    files = [planned_file(ind, 64 << 20, Compression.GZIP) for ind in range(8)]
+    assert choose(files) == Strategy.STREAMING
+
+
+def test_plan_config(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    file1 = tmp_path / "file1.txt"
+    file1.write_text("hello world\n")
+    link = tmp_path / "link.txt"
+    link.symlink_to(file1)
+
+    config = Config(
+        config_id=3,
+        mode=FileMode.FILES,
+        action=Action.STRING,
+        action_path=[str(file1), str(link)],
+    )
+
+    sniffed: list[str] = []
+
+    def detect_compression(path: str) -> Compression:
+        sniffed.append(path)
+        return Compression.NONE
+
+    monkeypatch.setattr(functions, "detect_compression", detect_compression)
+
+    execution_plan = plan_config(config)
+
+    assert execution_plan.strategy == Strategy.SERIAL
+    assert [file.size for file in execution_plan.files] == [12, 12]
+    assert len(execution_plan.distinct_files()) == 1
+    # once per distinct file
+    assert sniffed == [str(file1)]
+    assert "configuration 3" in execution_plan.explain()
+
+
+@pytest.mark.parametrize("strategy", list(Strategy))
+@pytest.mark.parametrize("action", list(Action)[1:])
+def test_execute_strategies(
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+    strategy: Strategy,
+    action: Action,
+) -> None:
+    monkeypatch.setattr(plan, "CHUNK_SIZE", 64)
+    monkeypatch.setattr(functions, "CHUNK_SIZE", 64)
+
+    paths = []
+    for ind in range(3):
+        path = tmp_path / f"file{ind}.txt"
+        path.write_text(
+            "".join(f"line {line} of file {ind} abc\n" for line in range(10 * ind))
+        )
+        paths.append(str(path))
+    paths.append(paths[1])
+
+    # too large to handle in memory when streaming, but can't be split
+    compressed = tmp_path / "file.txt.gz"
+    compressed.write_bytes(
+        gzip.compress(
+            "".join(f"compressed line {line}\n" for line in range(25)).encode()
+        )
+    )
+    paths += [str(compressed), str(compressed)]
+
+    config = Config(config_id=1, mode=FileMode.FILES, action=action, action_path=paths)
+
+    expected = execute_config(plan_config(config, strategy=Strategy.SERIAL))
+
+    stats = ExecutionStats()
+    result = execute_config(
+        plan_config(config, strategy=strategy, workers=2), memo_size=8, stats=stats
+    )
+
+    assert result == expected
+    assert (stats.files, stats.files_read) == (6, 4)
@@ -0,0 +1,144 @@
+import os
+import pathlib
+import pstats
+import subprocess
+import sys
+import tracemalloc
+
+import pytest
+
+import aqp
+from aqp import (
+    ProfileMode,
+    Strategy,
+    execute_config,
+    load_many,
+    loads,
+    plan_config,
+    profile,
+)
+from aqp.lib import functions
+from aqp.lib.profiling import active_profiler, stage
+
+
+@pytest.fixture
+def config_text(tmp_path: pathlib.Path) -> str:
+    paths = []
+    for ind in range(3):
+        path = tmp_path / f"file{ind}.txt"
+        path.write_text("abc def\n" * (100 * (ind + 1)))
+        paths.append(str(path))
+
+    return f"#1\n#mode: files\n#path: {', '.join(paths)}\n#action: replace\n"
+
+
+def function_names(stats: pstats.Stats) -> set[str]:
+    return {function for _, _, function in stats.stats}  # type: ignore[attr-defined]
+
+
+def test_profile_cpu(tmp_path: pathlib.Path, config_text: str) -> None:
+    expected = execute_config(loads(config_text)[1])
+
+    with profile(ProfileMode.CPU, tmp_path / "profile") as profiler:
+        config = loads(config_text)[1]
+        plan = plan_config(config, workers=2, strategy=Strategy.FILE_PARALLEL)
+        assert execute_config(plan) == expected
+
+    assert list(profiler.stages) == ["load", "execute"]
+
+    execute = profiler.stages["execute"]
+    assert len(execute.worker_pids) >= 1
+    assert os.getpid() not in execute.worker_pids
+
+    stats = pstats.Stats(str(tmp_path / "profile" / "execute.pstats"))
+    # handled in the workers, merged into the parent's profile
+    assert "_replace_handle_line" in function_names(stats)
+    assert "parse" in function_names(
+        pstats.Stats(str(tmp_path / "profile" / "load.pstats"))
+    )
+
+    summary = profiler.summary()
+    assert "[load]" in summary
+    assert "[execute]" in summary
+
+
+def test_profile_mem(tmp_path: pathlib.Path, config_text: str) -> None:
+    with profile("mem") as profiler:
+        execute_config(loads(config_text)[1])
+
+    paths = profiler.write(tmp_path)
+    assert sorted(os.path.basename(path) for path in paths) == [
+        "execute.snapshot",
+        "load.snapshot",
+    ]
+    assert isinstance(tracemalloc.Snapshot.load(paths[0]), tracemalloc.Snapshot)
+    assert not tracemalloc.is_tracing()
+    assert "peak" in profiler.summary()
+
+
+def test_profile_load_many_workers(
+    tmp_path: pathlib.Path, config_text: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(functions, "_LOAD_THROUGHPUT", 1)
+
+    paths = []
+    for ind in range(4):
+        path = tmp_path / f"{ind}.aqc"
+        path.write_text(config_text.replace("#1", f"#{ind}"))
+        paths.append(path)
+
+    with profile(ProfileMode.CPU) as profiler:
+        registry = load_many(paths, workers=2)
+
+    assert len(registry) == 4
+    assert list(profiler.stages) == ["load"]
+    assert profiler.stages["load"].worker_pids
+
+
+def test_profile_inactive() -> None:
+    assert active_profiler() is None
+
+    with stage("load") as profiler:
+        assert profiler is None
+
+    with profile(ProfileMode.CPU):
+        assert active_profiler() is not None
+
+        with pytest.raises(RuntimeError):
+            with profile(ProfileMode.MEM):
+                pass
+
+    assert active_profiler() is None
+
+
+def test_cli_profile(tmp_path: pathlib.Path, config_text: str) -> None:
+    config_path = tmp_path / "config.aqc"
+    config_path.write_text(config_text)
+    profile_dir = tmp_path / "profile"
+
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.path.dirname(os.path.dirname(aqp.__file__)),
+    }
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "aqp.cli",
+            str(config_path),
+            "1",
+            "--profile",
+            "cpu",
+            "--profile-out",
+            str(profile_dir),
+            "-o",
+            str(tmp_path / "out.json"),
+        ],
+        check=True,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+
+    assert sorted(os.listdir(profile_dir)) == ["execute.pstats", "load.pstats"]
+    assert "[execute]" in result.stderr
@@ -0,0 +1,73 @@
+import pathlib
+
+import pytest
+
+from aqp import FileMode, load_many
+from aqp.lib import functions
+from aqp.lib.functions import find_config_files
+from aqp.lib.parser import ParserError
+
+
+def write_configs(directory: pathlib.Path, count: int) -> list[pathlib.Path]:
+    paths = []
+    for ind in range(count):
+        path = directory / f"{ind:03}.aqc"
+        path.write_text(
+            f"#{ind}\n#mode: files\n#path: /data/{ind}.log\n#action: count\n"
+            f"#{1000 + ind % 3}\n#mode: dir\n#path: /data\n#action: string\n"
+        )
+        paths.append(path)
+    return paths
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_load_many(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch, workers: int
+) -> None:
+    # make the handful of bytes worth a pool
+    monkeypatch.setattr(functions, "_LOAD_THROUGHPUT", 1)
+    paths = write_configs(tmp_path, 20)
+
+    registry = load_many(paths, workers=workers)
+
+    assert len(registry) == 23
+    assert registry[5].action_path == ("/data/5.log",)
+    assert registry[5].path_to_config == paths[5]
+    assert registry[1001].mode == FileMode.DIR
+    assert registry[1001].path_to_config == paths[1]
+
+    assert set(registry.duplicates) == {1000, 1001, 1002}
+    assert registry.duplicates[1000] == paths[0::3]
+
+
+def test_load_many_small_files_in_process(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def no_pool(*args: object) -> None:
+        raise AssertionError("a pool was started")
+
+    monkeypatch.setattr(functions, "ProcessPoolExecutor", no_pool)
+    paths = write_configs(tmp_path, 50)
+
+    assert len(load_many(paths, workers=4)) == 53
+
+
+@pytest.mark.parametrize("throughput", [1, 512 << 10])
+def test_load_many_error_mentions_path(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch, throughput: int
+) -> None:
+    monkeypatch.setattr(functions, "_LOAD_THROUGHPUT", throughput)
+    paths = write_configs(tmp_path, 10)
+    paths[4].write_text("#4\n#mode: files\n")
+
+    with pytest.raises(ParserError, match="004.aqc"):
+        load_many(paths, workers=2)
+
+
+def test_find_config_files(tmp_path: pathlib.Path) -> None:
+    paths = [str(path) for path in write_configs(tmp_path, 3)]
+    (tmp_path / "notes.txt").write_text("")
+
+    assert find_config_files(tmp_path) == paths
+    assert find_config_files(str(tmp_path / "00[01].aqc")) == paths[:2]
+    assert find_config_files(paths[2]) == paths[2:]
@@ -0,0 +1,185 @@
+import gc
+import math
+import pathlib
+import time
+from typing import Callable
+
+import pytest
+
+from aqp import (
+    Action,
+    Config,
+    FileMode,
+    Strategy,
+    execute_config,
+    loads,
+    plan_config,
+)
+from aqp.lib.functions import _replace_handle_line
+from aqp.lib.lexer import Lexer
+from aqp.lib.reader import StringReader
+
+# Each case times a component at geometrically growing input sizes and fits the exponent
+# of ``time ~ size ** k`` on a log-log scale. Linear code has k close to 1, accidentally
+# quadratic code close to 2. Times are the process's CPU time, so other processes on a
+# shared machine don't add to them, and every timing is divided by that of a plain loop
+# over ``size`` items run right after it. The loop is linear by construction, so the
+# ratio cancels out whatever slows both down, like frequency scaling or cache pressure
+# from parallel tests. Taking the best of several runs and disabling the garbage collector
+# keeps the rest of the noise down, the threshold leaves room for it without letting a
+# quadratic path through.
+
+MAX_EXPONENT = 1.35
+REPEAT = 3
+
+Setup = Callable[[int], Callable[[], object]]
+
+
+def reference_loop(items: int) -> None:
+    for _ in range(items):
+        pass
+
+
+def best_times(*runs: Callable[[], object]) -> list[float]:
+    """Best CPU time of each of ``runs``, run in turns so they see the same conditions"""
+
+    best = [math.inf] * len(runs)
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(REPEAT):
+            for ind, run in enumerate(runs):
+                start = time.process_time()
+                run()
+                best[ind] = min(best[ind], time.process_time() - start)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return best
+
+
+def growth_exponent(setup: Setup, sizes: list[int]) -> float:
+    """Least squares slope of ``log(time / reference time)`` against ``log(size)``, plus
+    the reference's exponent of 1"""
+
+    xs = []
+    ys = []
+    scale = 0
+    for size in sizes:
+        run = setup(size)
+        run()  # warm up
+
+        if not scale:
+            # items per unit of size that make the reference about as long as the run
+            elapsed, reference = best_times(run, lambda: reference_loop(size))
+            scale = max(1, round(elapsed / max(reference, 1e-6)))
+
+        elapsed, reference = best_times(run, lambda: reference_loop(size * scale))
+        xs.append(math.log(size))
+        ys.append(math.log(elapsed / reference))
+
+    x_mean = sum(xs) / len(xs)
+    y_mean = sum(ys) / len(ys)
+    covariance = sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys))
+    variance = sum((x - x_mean) ** 2 for x in xs)
+    return 1 + covariance / variance
+
+
+def assert_linear(setup: Setup, sizes: list[int]) -> None:
+    exponent = growth_exponent(setup, sizes)
+    assert exponent < MAX_EXPONENT, f"grows as size ** {exponent:.2f}"
+
+
+def reader_forward(size: int) -> Callable[[], object]:
+    text = "#path: /some/file\n" * (size // 18)
+
+    def run() -> None:
+        reader = StringReader(text)
+        while not reader.eof():
+            reader.forward()
+
+    return run
+
+
+def lexer_config_length(size: int) -> Callable[[], object]:
+    text = "".join(
+        f"#{ind}\n#mode: files\n#path: /data/{ind}.log\n#action: count\n"
+        for ind in range(size)
+    )
+    return lambda: loads(text)
+
+
+def lexer_line_length(size: int) -> Callable[[], object]:
+    text = "#path: " + "/very/long/path" * (size // 15)
+    return lambda: Lexer(StringReader(text)).tokenise()
+
+
+def replace_line_length(size: int) -> Callable[[], object]:
+    line = "abcdefg hij " * (size // 12)
+    return lambda: _replace_handle_line(line, 3)
+
+
+@pytest.mark.parametrize(
+    "setup, sizes",
+    [
+        (reader_forward, [20_000, 40_000, 80_000, 160_000]),
+        (lexer_config_length, [250, 500, 1_000, 2_000]),
+        (lexer_line_length, [20_000, 40_000, 80_000, 160_000]),
+        (
+            replace_line_length,
+            [250_000, 500_000, 1_000_000, 2_000_000],
+        ),
+    ],
+    ids=["reader_forward", "lexer_config_length", "lexer_line_length", "replace_line"],
+)
+def test_in_memory_scaling(setup: Setup, sizes: list[int]) -> None:
+    assert_linear(setup, sizes)
+
+
+@pytest.fixture
+def execute_setups(tmp_path: pathlib.Path) -> dict[str, Setup]:
+    def line_count(size: int) -> Callable[[], object]:
+        path = tmp_path / f"lines_{size}.txt"
+        path.write_text("a b c d\n" * size)
+        # a second, empty file makes every line of the result padded
+        empty = tmp_path / f"empty_{size}.txt"
+        empty.write_text("")
+
+        config = Config(
+            config_id=1,
+            mode=FileMode.FILES,
+            action=Action.REPLACE,
+            action_path=[str(path), str(empty)],
+        )
+        plan = plan_config(config, strategy=Strategy.SERIAL)
+        return lambda: execute_config(plan)
+
+    def file_count(size: int) -> Callable[[], object]:
+        directory = tmp_path / f"files_{size}"
+        directory.mkdir()
+        for ind in range(size):
+            (directory / f"{ind:05}.txt").write_text("a b\n" * (1 + ind % 5))
+
+        config = Config(
+            config_id=1,
+            mode=FileMode.DIR,
+            action=Action.COUNT,
+            action_path=[str(directory)],
+        )
+        plan = plan_config(config, strategy=Strategy.SERIAL)
+        return lambda: execute_config(plan)
+
+    return {"line_count": line_count, "file_count": file_count}
+
+
+@pytest.mark.parametrize(
+    "name, sizes",
+    [
+        ("line_count", [25_000, 50_000, 100_000, 200_000]),
+        ("file_count", [50, 100, 200, 400]),
+    ],
+)
+def test_execute_scaling(
+    execute_setups: dict[str, Setup], name: str, sizes: list[int]
+) -> None:
+    assert_linear(execute_setups[name], sizes)
@@ -0,0 +1,324 @@
+import os
+import pathlib
+import queue
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable
+
+import pytest
+
+import aqp
+from aqp import Action, Config, ExecutionStats, FileMode, execute_config, load_output
+from aqp.lib.cache import ColumnCache
+from aqp.lib.parser import ParserError
+from aqp.lib.watch import InotifyWatcher, PollingWatcher, Watcher, watch
+
+TIMEOUT = 10
+
+
+def test_column_cache(tmp_path: pathlib.Path) -> None:
+    paths = []
+    for ind in range(3):
+        path = tmp_path / f"file{ind}.txt"
+        path.write_text(f"a b c\nfile {ind}\n")
+        paths.append(str(path))
+
+    config = Config(
+        config_id=1, mode=FileMode.FILES, action=Action.REPLACE, action_path=paths
+    )
+    cache = ColumnCache()
+
+    execute_config(config, cache=cache)
+    (tmp_path / "file1.txt").write_text("changed\n")
+
+    stats = ExecutionStats()
+    result = execute_config(config, stats=stats, cache=cache)
+
+    assert (stats.files_read, stats.files_cached) == (1, 2)
+    assert result == execute_config(config)
+
+
+def test_column_cache_max_size(tmp_path: pathlib.Path) -> None:
+    paths = []
+    for ind in range(3):
+        path = tmp_path / f"file{ind}.txt"
+        path.write_text(f"a b c\nfile {ind}\n")
+        paths.append(str(path))
+
+    config = Config(
+        config_id=1, mode=FileMode.FILES, action=Action.REPLACE, action_path=paths
+    )
+    cache = ColumnCache()
+    execute_config(config, cache=cache)
+    column_size = cache.size // 3
+
+    # room for two of the three columns
+    cache = ColumnCache(max_size=2 * column_size)
+    execute_config(config, cache=cache)
+    assert (len(cache), cache.size) == (2, 2 * column_size)
+
+    stats = ExecutionStats()
+    result = execute_config(config, stats=stats, cache=cache)
+
+    assert (stats.files_read, stats.files_cached) == (1, 2)
+    assert cache.size <= cache.max_size
+    assert result == execute_config(config)
+
+
+watchers: list[Callable[[], Watcher]] = [
+    lambda: PollingWatcher(interval=0.05),
+    InotifyWatcher,
+]
+
+
+@pytest.mark.parametrize("make_watcher", watchers)
+def test_watcher(tmp_path: pathlib.Path, make_watcher: Callable[[], Watcher]) -> None:
+    watched = tmp_path / "watched.txt"
+    other = tmp_path / "other.txt"
+    watched.write_text("a\n")
+    (tmp_path / "dir").mkdir()
+
+    watcher = make_watcher()
+    try:
+        watcher.watch([str(watched)], [str(tmp_path / "dir")])
+
+        assert watcher.wait(timeout=0.2) == set()
+
+        other.write_text("not watched\n")
+        assert watcher.wait(timeout=0.2) == set()
+
+        watched.write_text("a\nb\n")
+        assert str(watched) in watcher.wait(timeout=TIMEOUT)
+
+        (tmp_path / "dir" / "new.txt").write_text("new\n")
+        assert str(tmp_path / "dir" / "new.txt") in watcher.wait(timeout=TIMEOUT)
+    finally:
+        watcher.close()
+
+
+def test_inotify_watcher_continuous_writes(tmp_path: pathlib.Path) -> None:
+    log = tmp_path / "app.log"
+    log.write_text("")
+    stop = threading.Event()
+
+    def append() -> None:
+        # stops by itself, so a watcher that waits for quiet fails instead of hanging
+        deadline = time.monotonic() + 5
+        with open(log, "a") as file:
+            while not stop.wait(0.05) and time.monotonic() < deadline:
+                file.write("line\n")
+                file.flush()
+
+    watcher = InotifyWatcher(debounce=0.1, max_delay=0.3)
+    writer = threading.Thread(target=append)
+    try:
+        watcher.watch([str(log)])
+        writer.start()
+
+        start = time.monotonic()
+        assert str(log) in watcher.wait(timeout=0.5)
+        assert time.monotonic() - start < 1
+
+        start = time.monotonic()
+        assert str(log) in watcher.wait(timeout=TIMEOUT)
+        assert time.monotonic() - start < 1
+    finally:
+        stop.set()
+        writer.join(TIMEOUT)
+        watcher.close()
+
+
+def test_watch(tmp_path: pathlib.Path) -> None:
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "file1.txt").write_text("a b\n")
+    (data / "file2.txt").write_text("c\n")
+
+    config_path = tmp_path / "config.aqc"
+    config_path.write_text(f"#1\n#mode: dir\n#path: {data}\n#action: count\n")
+    output_path = tmp_path / "out.json"
+
+    runs: queue.Queue[tuple[Config, ExecutionStats]] = queue.Queue()
+    stop = threading.Event()
+
+    thread = threading.Thread(
+        target=watch,
+        args=(config_path, 1, output_path),
+        kwargs={"on_run": lambda *run: runs.put(run), "stop": stop},
+    )
+    thread.start()
+
+    try:
+        _, stats = runs.get(timeout=TIMEOUT)
+        assert stats.files_read == 2
+        assert load_output(output_path)["out"] == {1: {1: "2", 2: "1"}}
+
+        (data / "file2.txt").write_text("c d e\n")
+        _, stats = runs.get(timeout=TIMEOUT)
+        assert (stats.files_read, stats.files_cached) == (1, 1)
+        assert load_output(output_path)["out"] == {1: {1: "2", 2: "3"}}
+
+        config_path.write_text(f"#1\n#mode: dir\n#path: {data}\n#action: string\n")
+        config, stats = runs.get(timeout=TIMEOUT)
+        assert config.action == Action.STRING
+        assert load_output(output_path)["out"] == {1: {1: "a b", 2: "c d e"}}
+    finally:
+        stop.set()
+        thread.join(TIMEOUT)
+
+    assert not thread.is_alive()
+    # no temporary outputs left behind
+    assert sorted(path.name for path in tmp_path.iterdir() if path.is_file()) == [
+        "config.aqc",
+        "out.json",
+    ]
+
+
+def test_watch_recovers_from_errors(tmp_path: pathlib.Path) -> None:
+    log = tmp_path / "app.log"
+    log.write_text("a b\n")
+
+    config_path = tmp_path / "config.aqc"
+    config_text = f"#1\n#mode: files\n#path: {log}\n#action: count\n"
+    config_path.write_text(config_text)
+    output_path = tmp_path / "out.json"
+
+    runs: queue.Queue[tuple[Config, ExecutionStats]] = queue.Queue()
+    errors: queue.Queue[Exception] = queue.Queue()
+    stop = threading.Event()
+
+    thread = threading.Thread(
+        target=watch,
+        args=(config_path, 1, output_path),
+        kwargs={
+            "on_run": lambda *run: runs.put(run),
+            "on_error": errors.put,
+            "stop": stop,
+        },
+    )
+    thread.start()
+
+    try:
+        runs.get(timeout=TIMEOUT)
+        assert load_output(output_path)["out"] == {1: {1: "2"}}
+
+        # rotated away: the run fails, the last output is kept
+        log.unlink()
+        assert isinstance(errors.get(timeout=TIMEOUT), FileNotFoundError)
+        assert load_output(output_path)["out"] == {1: {1: "2"}}
+
+        log.write_text("a b c\n")
+        runs.get(timeout=TIMEOUT)
+        assert load_output(output_path)["out"] == {1: {1: "3"}}
+
+        # an invalid config is reported, the last one that loaded keeps being used
+        config_path.write_text("#1\n#mode: files\n")
+        assert isinstance(errors.get(timeout=TIMEOUT), ParserError)
+        config, stats = runs.get(timeout=TIMEOUT)
+        assert config.action == Action.COUNT
+        assert stats.files_cached == 1
+
+        log.write_text("a\n")
+        config, _ = runs.get(timeout=TIMEOUT)
+        assert config.action == Action.COUNT
+        assert load_output(output_path)["out"] == {1: {1: "1"}}
+
+        config_path.write_text(config_text.replace("count", "string"))
+        config, _ = runs.get(timeout=TIMEOUT)
+        assert config.action == Action.STRING
+        assert errors.empty()
+    finally:
+        stop.set()
+        thread.join(TIMEOUT)
+
+    assert not thread.is_alive()
+
+
+@pytest.mark.parametrize("config_path", ["configs", "configs/*.aqc"])
+def test_watch_new_config_file(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch, config_path: str
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data.txt").write_text("a b\n")
+    (tmp_path / "configs").mkdir()
+    config_text = "#1\n#mode: files\n#path: data.txt\n#action: count\n"
+    (tmp_path / "configs" / "b.aqc").write_text(config_text)
+
+    runs: queue.Queue[tuple[Config, ExecutionStats]] = queue.Queue()
+    stop = threading.Event()
+
+    thread = threading.Thread(
+        target=watch,
+        args=(config_path, 1, "out.json"),
+        kwargs={"on_run": lambda *run: runs.put(run), "stop": stop},
+    )
+    thread.start()
+
+    try:
+        config, _ = runs.get(timeout=TIMEOUT)
+        assert config.action == Action.COUNT
+
+        # sorts first, so its definition wins
+        (tmp_path / "configs" / "a.aqc").write_text(
+            config_text.replace("count", "string")
+        )
+        config, _ = runs.get(timeout=TIMEOUT)
+        assert config.action == Action.STRING
+        assert load_output(tmp_path / "out.json")["out"] == {1: {1: "a b"}}
+    finally:
+        stop.set()
+        thread.join(TIMEOUT)
+
+    assert not thread.is_alive()
+
+
+def run_cli(*args: str) -> subprocess.Popen[str]:
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.path.dirname(os.path.dirname(aqp.__file__)),
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "aqp.cli", *args],
+        env=env,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+
+
+def test_cli_watch_missing_data_file(tmp_path: pathlib.Path) -> None:
+    log = tmp_path / "app.log"
+    config_path = tmp_path / "config.aqc"
+    config_path.write_text(f"#1\n#mode: files\n#path: {log}\n#action: count\n")
+    output_path = tmp_path / "config_out.json"
+
+    process = run_cli(str(config_path), "1", "--watch")
+    try:
+        assert process.stderr is not None
+        assert "No such file or directory" in process.stderr.readline()
+        assert process.poll() is None
+
+        log.write_text("a b\n")
+        deadline = time.monotonic() + TIMEOUT
+        while not output_path.exists() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert load_output(output_path)["out"] == {1: {1: "2"}}
+    finally:
+        process.terminate()
+        process.communicate(timeout=TIMEOUT)
+
+
+@pytest.mark.parametrize(
+    "args", [["--strategy", "serial"], ["--workers", "2"], ["--explain"], []]
+)
+def test_cli_watch_rejected_options(tmp_path: pathlib.Path, args: list[str]) -> None:
+    for name in ["a.aqc", "b.aqc"]:
+        (tmp_path / name).write_text("#1\n#mode: files\n#path: x\n#action: count\n")
+    config_path = str(tmp_path / "a.aqc") if args else str(tmp_path)
+
+    process = run_cli(config_path, "1", "--watch", *args)
+    _, stderr = process.communicate(timeout=TIMEOUT)
+
+    assert process.returncode == 2
+    assert "--watch" in stderr